@@ -1,13 +1,29 @@
-from flask import Flask, jsonify, request, send_from_directory, render_template, redirect
-import requests
+from flask import (Flask, Response, jsonify, request, send_from_directory, render_template, redirect, g,
+                   has_app_context, stream_with_context, url_for)
+from flask.cli import AppGroup
+from flask.json.provider import DefaultJSONProvider
+import click
 import random
 import os
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import logging
+import mimetypes
 from deep_translator import GoogleTranslator
+import deep_translator.google
+import requests
 import hashlib
+import json
+import re
 import time
+import threading
+from types import MappingProxyType
+
+# Carregar variáveis de ambiente (antes dos módulos locais, que leem
+# configurações como TRANSLATION_STORE_PATH e METRICS_MULTIPROC_DIR no import)
+load_dotenv()
 
 # Importar o sistema de cache
 from cache import (
@@ -15,19 +31,40 @@ from cache import (
     cards_cache_obj, 
     translation_cache_obj,
     get_cached,
+    request_coalescer,
 )
+from translation_store import translation_store_obj, translations_cli
+from assets import asset_manifest_obj, assets_cli, ENCODINGS
+from deck import (DEFAULT_BUNDLE_PATH, build_bundle, save_bundle, load_bundle, make_deck_state,
+                  derived, current_derived, card_texts, AdaptedCardTable)
+from search_index import SearchIndex
+from response_cache import response_cache_obj
+from spreads import BATCH_SPREADS, generate_readings, iter_readings
+from upstream import UpstreamClient, CircuitBreaker, CircuitOpenError
+from health import HealthProber
+from metrics import metrics_obj
+from profiling import RequestProfiler, token_matches
+import timing
+from timing import span, timed
+from workers import BoundedExecutor, wait_for, set_deadline, clear_deadline
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Carregar variáveis de ambiente
-load_dotenv()
-
+# Arquivos estáticos servidos por serve_static (versões pré-comprimidas e cache longo)
 app = Flask(__name__, 
             template_folder='templates',
-            static_folder='static',
-            static_url_path='/static')
+            static_folder=None)
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON padrão do Flask, com a serialização medida como etapa 'json'"""
+    
+    def dumps(self, obj, **kwargs):
+        with span('json'):
+            return super().dumps(obj, **kwargs)
+
+app.json = TimedJSONProvider(app)
 
 # flask_cors.CORS(app)
 
@@ -39,180 +76,749 @@ def add_cors_headers(response):
 
 app.after_request(add_cors_headers)
 
+# ========== MÉTRICAS ==========
+
+metrics = metrics_obj
+
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        labels = (("method", request.method), ("route", route))
+        metrics.inc("tarot_http_requests_total", labels + (("status", str(response.status_code)),))
+        metrics.observe("tarot_http_request_duration_seconds", labels, time.perf_counter() - started)
+        metrics.flush()
+    return response
+
+app.before_request(start_request_timer)
+app.after_request(record_request_metrics)
+
+# ========== SERVER-TIMING ==========
+
+# Com TIMING_LOG, cada requisição da API gera também uma linha de log em JSON
+TIMING_LOG = os.getenv('TIMING_LOG', '').lower() in ('1', 'true', 'yes')
+
+def start_request_timings():
+    timing.start_request()
+
+def add_server_timing(response):
+    timings = timing.current()
+    if timings is None or not request.path.startswith('/api/'):
+        return response
+    
+    response.headers['Server-Timing'] = timing.server_timing_header(timings)
+    response.headers['Timing-Allow-Origin'] = '*'
+    
+    if TIMING_LOG:
+        logger.info("timing " + json.dumps({
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "total_ms": round(timings.total() * 1000, 2),
+            "spans": {name: {"ms": round(ms, 2), "calls": calls} for name, ms, calls in timings.breakdown()}
+        }))
+    return response
+
+def end_request_timings(error=None):
+    timing.end_request()
+
+app.before_request(start_request_timings)
+app.after_request(add_server_timing)
+app.teardown_request(end_request_timings)
+
+# ========== PROFILING ==========
+
+# Token das rotas /api/admin/profiles e dos perfis sob demanda
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+# Perfis com cProfile: PROFILING_ENABLED liga; com o token no cabeçalho
+# X-Profile-Token (ou ?_profile=) a requisição é perfilada, e com
+# PROFILE_SAMPLE_RATE=N uma a cada N requisições também
+profiler = RequestProfiler(
+    app.wsgi_app,
+    enabled=os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes'),
+    token=ADMIN_TOKEN,
+    sample_rate=int(os.getenv('PROFILE_SAMPLE_RATE', 0)),
+    keep=int(os.getenv('PROFILE_KEEP', 20)),
+    output_dir=os.getenv('PROFILE_DIR') or None
+)
+app.wsgi_app = profiler
+
+def is_admin():
+    return token_matches(request.headers.get('X-Admin-Token'), ADMIN_TOKEN)
+
+# Comandos de linha (flask translations ..., flask assets build)
+app.cli.add_command(translations_cli)
+app.cli.add_command(assets_cli)
+
 # Configuração da API tarotapi.dev
-TAROT_API_URL = "https://tarotapi.dev/api/v1"
+TAROT_API_URL = os.getenv('TAROT_API_URL', "https://tarotapi.dev/api/v1")
+
+def observe_upstream(outcome, seconds):
+    """Cada tentativa de chamada à API entra nas métricas e no Server-Timing"""
+    metrics.observe_call('upstream', outcome, seconds)
+    timing.record('upstream', seconds)
+
+# Cliente HTTP compartilhado (pool keep-alive, retries e circuit breaker)
+upstream = UpstreamClient(
+    TAROT_API_URL,
+    pool_size=int(os.getenv('UPSTREAM_POOL_SIZE', 10)),
+    retries=int(os.getenv('UPSTREAM_RETRIES', 2)),
+    backoff=float(os.getenv('UPSTREAM_BACKOFF', 0.2)),
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.getenv('UPSTREAM_BREAKER_THRESHOLD', 5)),
+        reset_timeout=int(os.getenv('UPSTREAM_BREAKER_RESET', 30))
+    ),
+    observer=observe_upstream
+)
+
+def check_tarot_api():
+    response = upstream.get("/cards/random?n=1", timeout=3, retries=0)
+    return response.status_code == 200
+
+def check_translator():
+    return bool(GoogleTranslator(source='en', target='pt').translate('hello'))
+
+# Verificação periódica das dependências em segundo plano (0 desativa)
+health_prober = HealthProber(
+    {"tarot_api": check_tarot_api, "translator": check_translator},
+    interval=int(os.getenv('HEALTH_PROBE_INTERVAL', 30))
+)
+
+@app.before_request
+def start_background_tasks():
+    # Iniciado na primeira requisição de cada processo (compatível com fork e serverless)
+    health_prober.ensure_started()
+    metrics.ensure_flusher()
 
 # Cache para as cartas (usando o objeto já importado)
 cards_cache = cards_cache_obj
 translation_cache = translation_cache_obj
+translation_store = translation_store_obj
+response_cache = response_cache_obj
 
-def fetch_all_cards(force_refresh=False):
+# Baralho pré-traduzido gerado no build (flask deck build)
+DECK_BUNDLE_PATH = os.getenv('DECK_BUNDLE_PATH', DEFAULT_BUNDLE_PATH)
+deck_bundle = load_bundle(DECK_BUNDLE_PATH)
+
+if deck_bundle:
+    logger.info(f"Bundle do baralho carregado: {deck_bundle.get_stats()}")
+
+# Traduções do baralho carregadas por warm_up() (no master do gunicorn):
+# somente leitura, compartilhadas pelos workers, sem TTL nem remoção
+preloaded_translations = MappingProxyType({})
+
+def static_translation(text):
+    """Tradução que não depende de cache: bundle do build ou tabela pré-carregada"""
+    if deck_bundle:
+        bundled = deck_bundle.translate(text)
+        if bundled is not None:
+            return bundled
+    return preloaded_translations.get(text)
+
+# Validade do baralho no cache e por quanto tempo um baralho expirado
+# ainda pode ser servido enquanto é revalidado em segundo plano
+DECK_TTL = int(os.getenv('DECK_TTL', 300))
+DECK_MAX_STALENESS = int(os.getenv('DECK_MAX_STALENESS', 3600))
+
+def fetch_deck_from_api(previous=None):
+    """
+    Busca o baralho completo na API (sem cache) e retorna um DeckState.
+    Usa If-None-Match com o ETag do baralho anterior: se a API responder
+    304, o estado anterior é reaproveitado (mesma versão).
+    """
+    try:
+        logger.info("Buscando cartas da API...")
+        headers = {}
+        if previous is not None and previous.etag:
+            headers['If-None-Match'] = previous.etag
+        
+        response = upstream.get("/cards", timeout=10, headers=headers)
+        
+        if response.status_code == 304 and previous is not None:
+            logger.info(f"Baralho não modificado (versão {previous.version})")
+            return previous._replace(fetched_at=time.time())
+        elif response.status_code == 200:
+            data = response.json()
+            cards = data.get('cards', [])
+            logger.info(f"API retornou {len(cards)} cartas")
+            if not cards:
+                return None
+            return make_deck_state(cards, etag=response.headers.get('ETag'))
+        else:
+            logger.error(f"Erro na API: {response.status_code}")
+            return None
+    except CircuitOpenError as e:
+        logger.warning(f"API indisponível, mantendo baralho em cache: {e}")
+        return None
+    except Exception as e:
+        logger.error(f"Erro ao buscar cartas: {e}")
+        return None
+
+def refresh_deck():
+    """
+    Atualiza o baralho a partir da API. O novo estado só substitui o
+    atual (troca atômica) se a busca der certo; em caso de erro o
+    baralho anterior continua sendo servido.
+    """
+    global deck_bundle
+    cache_key = "all_cards"
+    
+    previous = deck_bundle.state if deck_bundle else cards_cache.get_stale(cache_key)
+    state = request_coalescer.do("deck:refresh", lambda: fetch_deck_from_api(previous))
+    
+    if state is None:
+        return previous
+    
+    if deck_bundle:
+        # Troca o baralho em memória mantendo as traduções do bundle
+        deck_bundle = deck_bundle.with_state(state)
+    else:
+        cards_cache.set(cache_key, state, ttl=DECK_TTL, stale_ttl=DECK_MAX_STALENESS)
+    
+    if previous is None or previous.version != state.version:
+        logger.info(f"Baralho atualizado para a versão {state.version}")
+        # Reconstrói o índice de busca e a tabela de cartas para a nova versão
+        get_search_index(state)
+        get_adapted_table(state)
+    
+    return state
+
+def get_deck_state(force_refresh=False):
     """
-    Busca todas as cartas da API usando o sistema de cache
+    Retorna o DeckState atual.
+    Com bundle carregado, serve direto da memória; a API só é consultada
+    em force_refresh (rota /api/admin/refresh-cache) ou quando não há bundle.
+    Sem bundle, um baralho expirado continua sendo servido (até
+    DECK_MAX_STALENESS) enquanto é revalidado em segundo plano.
     """
     cache_key = "all_cards"
     
     if force_refresh:
-        # Força remoção do cache
-        cards_cache.delete(cache_key)
+        return refresh_deck()
     
-    # Usa a função utilitária get_cached
-    def fetch_from_api():
-        try:
-            logger.info("Buscando cartas da API...")
-            response = requests.get(f"{TAROT_API_URL}/cards", timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                cards = data.get('cards', [])
-                logger.info(f"API retornou {len(cards)} cartas")
-                return cards
-            else:
-                logger.error(f"Erro na API: {response.status_code}")
-                return None
-        except Exception as e:
-            logger.error(f"Erro ao buscar cartas: {e}")
-            return None
+    if deck_bundle:
+        return deck_bundle.state
     
     # Tenta obter do cache ou buscar da API
-    cards = get_cached(cache_key, fetch_from_api, cards_cache)
+    return get_cached(
+        cache_key,
+        lambda: fetch_deck_from_api(cards_cache.get_stale(cache_key)),
+        cards_cache,
+        ttl=DECK_TTL,
+        stale_ttl=DECK_MAX_STALENESS
+    )
+
+def peek_deck_state():
+    """Baralho atual (inclusive expirado) sem disparar nenhuma busca"""
+    if deck_bundle:
+        return deck_bundle.state
+    return cards_cache.get_stale("all_cards")
+
+@timed('deck')
+def fetch_all_cards(force_refresh=False):
+    """
+    Busca todas as cartas usando o sistema de cache
+    """
+    state = get_deck_state(force_refresh)
     
-    if cards is None:
+    if state is None:
         logger.warning("Não foi possível obter cartas da API nem do cache")
         return []
     
-    return cards
+    return state.cards
+
+def current_deck_version():
+    """Versão do baralho atual (parte da chave do cache de respostas)"""
+    state = get_deck_state()
+    return state.version if state and state.cards else None
+
+# Origem das cartas de /api/tarot/random: 'local' (baralho em memória) ou 'remote'
+RANDOM_SOURCE = os.getenv('RANDOM_SOURCE', 'local')
 
-def adapt_card_format(card, position=None):
-    """Adapta o formato da carta da API para o formato do frontend"""
+def seeded_rng(seed=None):
+    """
+    (seed, rng) com a semente sempre em texto: a que é devolvida ao cliente
+    (X-Random-Seed, "seed") é exatamente a usada no sorteio, e repetir
+    ?seed=<valor> ou {"seed": valor} reproduz a tirada. Sem semente, sorteia uma.
+    """
+    if seed is None or not str(seed).strip():
+        seed = random.getrandbits(64)
+    seed = str(seed)
+    return seed, random.Random(seed)
+
+def request_rng():
+    """
+    Gerador aleatório isolado para a requisição.
+    Usa ?seed= quando informado (tirada reproduzível); senão sorteia uma semente.
+    Retorna (seed, rng).
+    """
+    return seeded_rng(request.args.get('seed'))
+
+def fetch_random_from_api(n, rng):
+    """Sorteio remoto (opcional) na tarotapi.dev; None se falhar"""
+    try:
+        response = upstream.get(f"/cards/random?n={n}", timeout=5, retries=0)
+        
+        if response.status_code == 200:
+            data = response.json()
+            cards = data.get('cards', [])
+            return [adapt_card_format(card, rng.choice(['upright', 'reversed'])) for card in cards]
+    except Exception as e:
+        logger.warning(f"Erro ao buscar da API, usando cache: {e}")
+    
+    return None
+
+def get_search_index(state):
+    """Índice de busca da versão atual do baralho (construído uma vez por versão)"""
+    def build(state):
+        translations = translate_many(text for card in state.cards for text in card_texts(card))
+        index = SearchIndex.from_cards(state.cards, lambda text: translations.get(text, text))
+        # Sem todas as traduções o índice serve só esta requisição
+        index.partial = bool(translations.missing)
+        return index
+    
+    return derived(state, 'search_index', build)
+
+def get_adapted_table(state=None):
+    """
+    Tabela de cartas adaptadas da versão do baralho.
+    Sem state, usa a última tabela construída (sem consultar o cache).
+    """
+    if state is None:
+        table = current_derived('adapted_cards')
+        if table is not None:
+            return table
+        state = get_deck_state()
+        if state is None:
+            return None
+    
+    return derived(state, 'adapted_cards',
+                   lambda state: AdaptedCardTable(state, build_adapted_card, build_adapted_cards))
+
+def build_adapted_cards(cards):
+    """Adapta várias cartas traduzindo os textos de todas em lote"""
+    translations = translate_many(text for card in cards for text in card_texts(card))
+    return [build_adapted_card(card, translations) for card in cards]
+
+def build_adapted_card(card, translations=None):
+    """
+    Adapta o formato da carta da API para o formato do frontend.
+    Campos que ficaram em inglês (tradução fora do prazo) são listados em 'untranslated'.
+    """
     try:
+        if translations is None:
+            # Os textos da carta vão juntos numa única tradução em lote
+            translations = translate_many(card_texts(card))
+        translate = lambda text: translations.get(text, text)
+        
         name = card.get('name', 'Carta desconhecida')
+        sources = {
+            'name': name,
+            'meaning_upright': card.get('meaning_up', ''),
+            'meaning_reversed': card.get('meaning_rev', ''),
+            'description': card.get('desc', ''),
+            'suit': card.get('suit', '') if card.get('type') == 'minor' else None
+        }
         
         adapted = {
             'id': card.get('value_int', 0),
-            'name': translate_text(name),
+            'name': translate(name),
             'name_short': card.get('name_short', ''),
             'type': card.get('type', 'major'),
             'value': card.get('value', ''),
-            'meaning_upright': translate_text(card.get('meaning_up', '')),
-            'meaning_reversed': translate_text(card.get('meaning_rev', '')),
-            'description': translate_text(card.get('desc', '')),
-            'suit': translate_text(card.get('suit', '')) if card.get('type') == 'minor' else None,
+            'meaning_upright': translate(sources['meaning_upright']),
+            'meaning_reversed': translate(sources['meaning_reversed']),
+            'description': translate(sources['description']),
+            'suit': translate(sources['suit']) if sources['suit'] is not None else None,
             'original_name': name
         }
         
-        if position:
-            adapted['position'] = position
-            if position == 'upright':
-                adapted['interpretation'] = adapted['meaning_upright']
-            else:
-                adapted['interpretation'] = adapted['meaning_reversed']
+        missing = getattr(translations, 'missing', None)
+        if missing:
+            untranslated = [field for field, text in sources.items() if text in missing]
+            if untranslated:
+                adapted['untranslated'] = untranslated
         
         return adapted
     except Exception as e:
         logger.error(f"Erro ao adaptar carta: {e}")
         return {}
 
+@timed('adapt')
+def adapt_card_format(card, position=None, table=None):
+    """
+    Adapta o formato da carta da API para o formato do frontend.
+    Usa a tabela memoizada da versão do baralho e só sobrepõe
+    position/interpretation em uma cópia rasa.
+    """
+    table = table or get_adapted_table()
+    base = table.get_for_card(card) if table else None
+    
+    if base is None and table is not None:
+        # A carta pode ser de uma versão mais nova do baralho
+        state = get_deck_state()
+        if state is not None and state.version != table.version:
+            base = get_adapted_table(state).get_for_card(card)
+    
+    if base is None:
+        base = build_adapted_card(card)
+        if not base:
+            return {}
+    
+    adapted = dict(base)
+    
+    if position:
+        adapted['position'] = position
+        if position == 'upright':
+            adapted['interpretation'] = adapted['meaning_upright']
+        else:
+            adapted['interpretation'] = adapted['meaning_reversed']
+    
+    return adapted
+
 def translate_text(text):
-    """Traduz texto do inglês para português com cache"""
+    """Traduz um texto do inglês para português (o mesmo caminho de translate_many)"""
     if not text or not isinstance(text, str):
         return text
+    return translate_many([text])[text]
+
+# Os textos de um lote vão ao tradutor numa única chamada, separados por
+# um marcador que ele preserva; até TRANSLATE_BATCH_CHARS caracteres por chamada
+TRANSLATE_BATCH_MARKER = "@@@"
+TRANSLATE_BATCH_SEPARATOR = f"\n\n{TRANSLATE_BATCH_MARKER}\n\n"
+TRANSLATE_BATCH_SPLIT = re.compile(rf"\s*{TRANSLATE_BATCH_MARKER}\s*")
+TRANSLATE_BATCH_CHARS = int(os.getenv('TRANSLATE_BATCH_CHARS', 4000))
+
+# Textos maiores que isso são divididos em frases (traduzidas e guardadas
+# uma a uma, e reaproveitadas entre cartas) em vez de cortados
+TRANSLATE_CHUNK_CHARS = int(os.getenv('TRANSLATE_CHUNK_CHARS', 500))
+SENTENCE_BREAK = re.compile(r'(?<=[.!?;])(\s+)')
+
+def split_for_translation(text, limit=None):
+    """
+    Divide um texto longo em frases de até limit caracteres (frases maiores
+    são quebradas entre palavras). Retorna (pedaços, separadores), para
+    remontar como pedaço0 + separador0 + pedaço1 + ...
+    """
+    limit = limit or TRANSLATE_CHUNK_CHARS
+    parts = SENTENCE_BREAK.split(text.strip())
+    sentences, gaps = parts[0::2], parts[1::2] + ['']
     
-    # Cria chave baseada no texto
-    cache_key = f"translation:{hashlib.md5(text.encode()).hexdigest()}"
+    chunks, separators = [], []
+    for sentence, gap in zip(sentences, gaps):
+        while len(sentence) > limit:
+            cut = sentence.rfind(' ', 0, limit)
+            if cut <= 0:
+                cut = limit
+            chunks.append(sentence[:cut])
+            separators.append(' ' if sentence[cut:cut + 1] == ' ' else '')
+            sentence = sentence[cut:].lstrip(' ')
+        if sentence:
+            chunks.append(sentence)
+            separators.append(gap)
     
-    # Tenta obter do cache de traduções
-    cached = translation_cache.get(cache_key)
-    if cached is not None:
-        return cached
+    return chunks, separators[:-1]
+
+def join_translated(chunks, separators):
+    return chunks[0] + ''.join(separator + chunk for separator, chunk in zip(separators, chunks[1:]))
+
+# Timeout (s) de cada chamada HTTP do tradutor. O deep_translator chama
+# requests.get sem timeout: um pedido travado prenderia uma thread do
+# executor para sempre
+TRANSLATOR_TIMEOUT = float(os.getenv('TRANSLATOR_TIMEOUT', 10))
+
+class TimeoutRequests:
+    """requests com timeout padrão, no lugar do módulo usado pelo deep_translator"""
+    
+    def __init__(self, timeout):
+        self.timeout = timeout
+    
+    def get(self, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return requests.get(url, **kwargs)
     
+    def __getattr__(self, name):
+        return getattr(requests, name)
+
+deep_translator.google.requests = TimeoutRequests(TRANSLATOR_TIMEOUT)
+
+def call_translator(source):
+    """Uma chamada ao tradutor; None se falhar"""
+    started = time.perf_counter()
     try:
-        # Limitar tamanho para evitar timeout
-        if len(text) > 500:
-            text = text[:500]
-        
-        translated = GoogleTranslator(source='en', target='pt').translate(text)
-        
-        # Armazenar no cache de traduções
-        translation_cache.set(cache_key, translated)
-        
+        with span('translator'):
+            translated = GoogleTranslator(source='en', target='pt').translate(source)
+        metrics.observe_call('translator', 'success', time.perf_counter() - started)
         return translated
     except Exception as e:
+        metrics.observe_call('translator', 'failure', time.perf_counter() - started)
         logger.warning(f"Erro na tradução: {e}")
-        return text
+        return None
 
-def generate_spread_summary(cards, spread_type):
-    """Gera um resumo significativo baseado nas cartas e no tipo de tirada"""
-    if not cards:
-        return "Não foi possível gerar um resumo."
-    
-    # Contar posições
-    upright_count = sum(1 for c in cards if c.get('position') == 'upright')
-    reversed_count = len(cards) - upright_count
-    
-    # Identificar tipos de cartas
-    major_count = sum(1 for c in cards if c.get('type') == 'major')
-    minor_count = len(cards) - major_count
-    
-    # Analisar naipes (para cartas menores)
-    suits = {}
-    for card in cards:
-        if card.get('suit'):
-            suit = card['suit'].lower()
-            suits[suit] = suits.get(suit, 0) + 1
-    
-    # Construir resumo baseado no tipo de tirada
-    summary_parts = []
-    
-    # Análise geral de energia
-    if upright_count > reversed_count:
-        summary_parts.append("✨ A maioria das cartas está na posição reta, indicando que as energias estão fluindo de forma favorável e direta.")
-    elif reversed_count > upright_count:
-        summary_parts.append("🌙 Há várias cartas invertidas, sugerindo a necessidade de introspecção e cuidado com energias bloqueadas.")
-    else:
-        summary_parts.append("⚖️ Há um equilíbrio entre cartas retas e invertidas, indicando um momento de integração entre luz e sombra.")
-    
-    # Análise de Arcanos Maiores vs Menores
-    if major_count > minor_count:
-        summary_parts.append("🃏 A presença forte de Arcanos Maiores indica que lições importantes do destino estão se manifestando.")
-    elif major_count == 0:
-        summary_parts.append("📜 Apenas Arcanos Menores surgiram, sugerindo que o foco está em situações práticas do dia a dia.")
-    
-    # Análise de naipes (se houver)
-    if suits:
-        suit_meanings = []
-        if suits.get('wands', 0) >= 2:
-            suit_meanings.append("⚡ energia criativa e ação (Paus)")
-        if suits.get('cups', 0) >= 2:
-            suit_meanings.append("💧 emoções e relacionamentos (Copas)")
-        if suits.get('swords', 0) >= 2:
-            suit_meanings.append("🌪️ conflitos e pensamentos (Espadas)")
-        if suits.get('pentacles', 0) >= 2:
-            suit_meanings.append("🌱 questões materiais e trabalho (Ouros)")
+def translation_batches(texts):
+    """Agrupa os textos em lotes de até TRANSLATE_BATCH_CHARS caracteres"""
+    batch, size = [], 0
+    for text in texts:
+        if TRANSLATE_BATCH_MARKER in text:
+            yield [text]
+            continue
         
-        if suit_meanings:
-            summary_parts.append(f"Os naipes em destaque são: {', '.join(suit_meanings)}.")
-    
-    # Adicionar contexto específico da tirada
-    if spread_type == 'three':
-        summary_parts.append("\n🔮 Nesta tirada de Passado/Presente/Futuro, observe como as energias evoluem através do tempo.")
-    elif spread_type == 'love':
-        summary_parts.append("\n💕 Esta tirada do amor revela a dinâmica entre você, o outro e a relação.")
-    elif spread_type == 'celtic':
-        summary_parts.append("\n🌀 A Cruz Celta é uma tirada profunda que mostra desde as influências inconscientes até o resultado potencial.")
-    
-    # Citar carta de destaque
-    if cards:
-        first_card = cards[0]
-        card_name = first_card.get('name', '')
-        card_position = first_card.get('position', 'upright')
-        card_meaning = first_card.get('meaning_upright' if card_position == 'upright' else 'meaning_reversed', '')
+        length = len(text) + len(TRANSLATE_BATCH_SEPARATOR)
+        if batch and size + length > TRANSLATE_BATCH_CHARS:
+            yield batch
+            batch, size = [], 0
+        batch.append(text)
+        size += length
+    
+    if batch:
+        yield batch
+
+def call_translator_batched(texts):
+    """
+    Traduz um lote numa única chamada ao tradutor (um a um se ele não
+    preservar os marcadores). Retorna as traduções na mesma ordem (None onde falhou).
+    """
+    if len(texts) == 1:
+        return [call_translator(texts[0])]
+    
+    translated = call_translator(TRANSLATE_BATCH_SEPARATOR.join(texts))
+    if translated is None:
+        return [None] * len(texts)
+    
+    parts = TRANSLATE_BATCH_SPLIT.split(translated.strip())
+    if len(parts) != len(texts):
+        logger.info(f"Lote de {len(texts)} traduções não pôde ser separado, traduzindo um a um")
+        return [call_translator(text) for text in texts]
+    
+    return parts
+
+# Orçamento de tempo (ms) das traduções de uma requisição da API: o que não
+# ficar pronto a tempo sai em inglês e termina em segundo plano (0 = sem limite)
+TRANSLATE_BUDGET_MS = int(os.getenv('TRANSLATE_BUDGET_MS', 2500))
+
+# Threads para as chamadas ao tradutor (os lotes de uma requisição vão em paralelo)
+translation_executor = BoundedExecutor(max_workers=int(os.getenv('TRANSLATE_WORKERS', 8)), name='translate')
+
+# Lotes em andamento: texto -> (future, enviado em, token do lote). Quem
+# precisa de um texto que já está sendo traduzido espera a mesma future em
+# vez de pedir de novo; depois de TRANSLATE_IN_FLIGHT_MAX segundos o lote é
+# dado como perdido e o texto volta a ser enviado
+translations_in_flight = {}
+translations_in_flight_lock = threading.Lock()
+TRANSLATE_IN_FLIGHT_MAX = float(os.getenv('TRANSLATE_IN_FLIGHT_MAX', 3 * TRANSLATOR_TIMEOUT))
+
+class TranslationResult(dict):
+    """dict texto -> tradução; missing guarda os textos que ficaram em inglês"""
+    
+    def __init__(self):
+        super().__init__()
+        self.missing = set()
+
+def translation_complete():
+    """False se alguma tradução da requisição atual ficou para depois do prazo"""
+    return not g.get('translation_partial', False)
+
+def start_translation_budget():
+    if request.path.startswith('/api/'):
+        set_deadline(TRANSLATE_BUDGET_MS / 1000)
+
+def mark_partial_response(response):
+    # Resposta com campos em inglês: nenhum cache deve guardá-la
+    if not translation_complete():
+        response.headers['Cache-Control'] = 'no-store'
+        response.headers['X-Translation'] = 'partial'
+    return response
+
+def end_translation_budget(error=None):
+    clear_deadline()
+
+app.before_request(start_translation_budget)
+app.after_request(mark_partial_response)
+app.teardown_request(end_translation_budget)
+
+def translate_and_store(batch, hashes, token=None):
+    """Tarefa do executor: traduz um lote e grava o resultado no store e no cache"""
+    try:
+        translated = call_translator_batched(batch)
+        new = [(text, value) for text, value in zip(batch, translated) if value is not None]
+        if new:
+            with span('store'):
+                translation_store.set_many(new, source_hashes=[hashes[text] for text, _ in new])
+            translation_cache.set_many([(f"translation:{hashes[text]}", value) for text, value in new])
+        return dict(new)
+    finally:
+        with translations_in_flight_lock:
+            for text in batch:
+                # Só a entrada deste lote (o texto pode ter sido reenviado)
+                entry = translations_in_flight.get(text)
+                if entry is not None and entry[2] is token:
+                    del translations_in_flight[text]
+
+@timed('translate')
+def translate_many(texts):
+    """
+    Traduz vários textos de uma vez: bundle, cache e store primeiro e, para
+    o que faltar (sem repetição), o tradutor em lotes paralelos até o prazo
+    da requisição. As novas traduções voltam para o cache e para o store,
+    inclusive as que terminarem depois do prazo.
+    
+    Textos longos são traduzidos por frases (split_for_translation): cada
+    frase é uma unidade própria no cache e no store, e o texto é remontado
+    no fim. O texto remontado completo vai só para o cache (não para o store).
+    
+    Retorna TranslationResult (texto -> tradução; o próprio texto quando não traduzido).
+    """
+    result = TranslationResult()
+    direct = []    # textos curtos, traduzidos inteiros
+    chunked = {}   # texto longo -> (pedaços, separadores)
+    found = {}     # unidade -> tradução
+    pending = {}   # unidade sem tradução em memória -> hash
+    hashes = {}    # texto -> hash (chave do cache e do store)
+    
+    def lookup(candidates):
+        """Traduções estáticas e depois o cache, numa única consulta (pipeline no backend compartilhado)"""
+        hits, keys = {}, {}
+        for text in candidates:
+            static = static_translation(text)
+            if static is not None:
+                hits[text] = static
+            else:
+                hashes[text] = hashlib.md5(text.encode()).hexdigest()
+                keys[f"translation:{hashes[text]}"] = text
+        for key, value in translation_cache.get_many(list(keys)).items():
+            hits[keys[key]] = value
+        return hits
+    
+    candidates = list(dict.fromkeys(text for text in texts if text and isinstance(text, str)))
+    hits = lookup(candidates)
+    
+    units = []
+    for text in candidates:
+        if len(text) > TRANSLATE_CHUNK_CHARS:
+            if text in hits:
+                result[text] = hits[text]
+                continue
+            chunked[text] = split_for_translation(text)
+            units.extend(chunked[text][0])
+        else:
+            direct.append(text)
+            if text in hits:
+                found[text] = hits[text]
+    
+    # Frases dos textos longos que ainda não estavam no cache
+    units = [unit for unit in dict.fromkeys(units) if unit not in found]
+    found.update(lookup(units))
+    
+    for text in direct + units:
+        if text not in found:
+            pending[text] = hashes[text]
+    
+    if pending:
+        with span('store'):
+            stored = translation_store.get_many(list(pending), source_hashes=list(pending.values()))
+        
+        translation_cache.set_many([(f"translation:{pending[text]}", value) for text, value in stored.items()])
+        found.update(stored)
         
-        if card_meaning:
-            short_meaning = card_meaning[:100] + "..." if len(card_meaning) > 100 else card_meaning
-            summary_parts.append(f"\n🎴 Destaque para {card_name}: {short_meaning}")
+        missing = [text for text in pending if text not in stored]
+        if missing:
+            futures = {}  # future -> textos desta chamada que ela traduz
+            with translations_in_flight_lock:
+                now = time.monotonic()
+                to_send = []
+                for text in missing:
+                    entry = translations_in_flight.get(text)
+                    if entry is not None and now - entry[1] < TRANSLATE_IN_FLIGHT_MAX:
+                        futures.setdefault(entry[0], []).append(text)
+                    else:
+                        to_send.append(text)
+                
+                for batch in translation_batches(to_send):
+                    token = object()
+                    future = translation_executor.submit(
+                        translate_and_store, batch, {text: pending[text] for text in batch}, token)
+                    for text in batch:
+                        translations_in_flight[text] = (future, now, token)
+                    futures[future] = batch
+            
+            done, _ = wait_for(list(futures))
+            for future in done:
+                try:
+                    translated = future.result()
+                except Exception as e:
+                    logger.warning(f"Erro em lote de traduções: {e}")
+                    continue
+                for text in futures[future]:
+                    if text in translated:
+                        found[text] = translated[text]
+    
+    for text in direct:
+        if text in found:
+            result[text] = found[text]
+        else:
+            result[text] = text
+            result.missing.add(text)
+    
+    assembled = []
+    for text, (chunks, separators) in chunked.items():
+        if all(chunk in found for chunk in chunks):
+            result[text] = join_translated([found[chunk] for chunk in chunks], separators)
+            assembled.append((f"translation:{hashes[text]}", result[text]))
+        else:
+            result[text] = text
+            result.missing.add(text)
+    if assembled:
+        translation_cache.set_many(assembled)
+    
+    if result.missing and has_app_context():
+        g.translation_partial = True
+    
+    return result
+
+# ========== STREAMING (NDJSON) ==========
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# Itens adaptados (e traduzidos em lote) por vez no modo streaming
+STREAM_CHUNK_SIZE = int(os.getenv('STREAM_CHUNK_SIZE', 10))
+
+def wants_stream():
+    """Modo streaming: ?stream=1 ou Accept: application/x-ndjson"""
+    if request.args.get('stream', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def ndjson_response(items, headers=None):
+    """
+    Resposta NDJSON (um objeto JSON por linha) enviada à medida que items
+    gera cada objeto: o cliente recebe o primeiro sem esperar o último.
+    Os cabeçalhos saem antes do corpo, então a resposta nunca é guardada
+    em cache. Um erro no meio vira uma última linha {"error": ...}.
+    """
+    def generate():
+        # Sem o orçamento de tempo da requisição: aqui ele só atrasaria o
+        # primeiro byte se fosse respeitado, e cada linha pode esperar a sua tradução
+        clear_deadline()
+        try:
+            for item in items:
+                yield app.json.dumps(item) + "\n"
+        except Exception as e:
+            logger.error(f"Erro no streaming de {request.path}: {e}")
+            yield app.json.dumps({"error": "Resposta interrompida"}) + "\n"
     
-    return " ".join(summary_parts)
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    response.headers['Cache-Control'] = 'no-store'
+    for name, value in (headers or {}).items():
+        response.headers[name] = str(value)
+    return response
 
 # ========== FUNÇÕES DE TRATAMENTO DE ERRO ==========
 
@@ -324,11 +930,38 @@ def card_detail(card_id):
         logger.error(f"Erro ao renderizar card_detail.html: {e}")
         return handle_error(404, "Página não encontrada", f"Detalhe da carta {card_id} não disponível")
 
+# Arquivos do build (flask assets build): nomes com hash do conteúdo
+asset_manifest = asset_manifest_obj
+ASSET_MAX_AGE = 365 * 24 * 3600
+
+def asset_url(name):
+    """URL de um arquivo de static/ (a versão com hash, se houver build). Uso: {{ asset_url('style.css') }}"""
+    return url_for('serve_static', filename=asset_manifest.resolve(name))
+
+app.jinja_env.globals['asset_url'] = asset_url
+
 @app.route('/static/<path:filename>')
 def serve_static(filename):
-    """Serve arquivos estáticos (CSS, JS)"""
+    """
+    Serve arquivos estáticos (CSS, JS). Os do build têm hash no nome:
+    nunca mudam, então vão com cache de um ano (immutable) e, se o cliente
+    aceitar, na versão pré-comprimida (.br ou .gz).
+    """
     try:
-        return send_from_directory('static', filename)
+        asset = asset_manifest.lookup(filename)
+        if asset is None:
+            return send_from_directory('static', filename)
+        
+        encoding, suffix = next(((encoding, suffix) for encoding, suffix in ENCODINGS
+                                 if encoding in asset['encodings'] and request.accept_encodings[encoding]),
+                                (None, ''))
+        response = send_from_directory('static', filename + suffix, max_age=ASSET_MAX_AGE,
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.immutable = True
+        return response
     except Exception as e:
         logger.error(f"Erro ao servir arquivo estático {filename}: {e}")
         return handle_error(404, f"Arquivo não encontrado: {filename}")
@@ -375,30 +1008,41 @@ def api_home():
             "GET /api/tarot/spread/three": "Tirada de 3 cartas",
             "GET /api/tarot/spread/celtic": "Tirada Cruz Celta",
             "GET /api/tarot/spread/love": "Tirada do Amor",
+            "GET|POST /api/tarot/spread/batch?type=three,love&count=100": "Várias tiradas de uma vez",
             "GET /api/tarot/card/<name_short>": "Detalhes de uma carta",
             "GET /api/tarot/search?q=amor": "Buscar cartas",
             "GET /api/tarot/daily": "Carta do dia",
             "POST /api/tarot/interpret": "Interpretar pergunta",
             "GET /api/cache/stats": "Estatísticas do cache",
+            "GET /metrics": "Métricas no formato Prometheus",
             "POST /api/cache/cleanup": "Limpar itens expirados"
         }
     })
 
 @app.route('/api/status', methods=['GET'])
 def status():
-    """Verifica status da API e cache"""
-    try:
-        response = requests.get(f"{TAROT_API_URL}/cards/random?n=1", timeout=3)
-        api_status = "online" if response.status_code == 200 else "offline"
-    except:
-        api_status = "offline"
+    """
+    Status da API e cache.
+    Responde na hora com o último estado medido pelo health prober
+    (nunca faz chamadas de rede nem busca o baralho).
+    """
+    health = health_prober.snapshot()
     
-    cards = fetch_all_cards()
+    deck_state = peek_deck_state()
+    cards = deck_state.cards if deck_state else []
     
     return jsonify({
-        "api_status": api_status,
+        "api_status": health['tarot_api']['status'],
+        "translator_status": health['translator']['status'],
+        "health": health,
+        "health_probe_interval_seconds": health_prober.interval,
         "cache_stats": cards_cache.get_stats(),
         "translation_cache_stats": translation_cache.get_stats(),
+        "translation_store_stats": translation_store.get_stats(),
+        "upstream_stats": upstream.get_stats(),
+        "translation_executor": translation_executor.get_stats(),
+        "deck_bundle": deck_bundle.get_stats() if deck_bundle else None,
+        "deck_version": deck_state.version if deck_state else None,
         "cards_in_cache": len(cards) if cards else 0,
         "timestamp": datetime.now().isoformat()
     })
@@ -409,10 +1053,41 @@ def cache_stats():
     return jsonify({
         "cards_cache": cards_cache.get_stats(),
         "translation_cache": translation_cache.get_stats(),
+        "translation_store": translation_store.get_stats(),
         "cards_keys": cards_cache.get_all_keys()[:10],
-        "translation_keys": translation_cache.get_all_keys()[:10]
+        "translation_keys": translation_cache.get_all_keys()[:10],
+        "response_cache": response_cache.get_stats(),
+        "single_flight": request_coalescer.get_stats()
     })
 
+def cache_metrics():
+    """Coletor das estatísticas dos caches para o /metrics"""
+    samples = []
+    caches = (("cards", cards_cache), ("translations", translation_cache), ("responses", response_cache))
+    for name, cache_obj in caches:
+        stats = cache_obj.get_stats()
+        labels = (("cache", name),)
+        samples.append(("tarot_cache_hits_total", labels, stats["hits"]))
+        samples.append(("tarot_cache_misses_total", labels, stats["misses"]))
+        samples.append(("tarot_cache_evictions_total", labels, stats["evictions"]))
+        samples.append(("tarot_cache_expirations_total", labels, stats["expirations"]))
+        samples.append(("tarot_cache_rejections_total", labels, stats["rejections"]))
+        samples.append(("tarot_cache_items", labels, stats["total_items"]))
+        samples.append(("tarot_cache_bytes", labels, stats["bytes"]))
+    
+    store_stats = translation_store.get_stats()
+    labels = (("cache", "translation_store"),)
+    samples.append(("tarot_cache_hits_total", labels, store_stats["hits"]))
+    samples.append(("tarot_cache_misses_total", labels, store_stats["misses"]))
+    return samples
+
+metrics.register_collector(cache_metrics)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Métricas no formato texto do Prometheus"""
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
 @app.route('/api/cache/cleanup', methods=['POST'])
 def cleanup_cache():
     """Limpa itens expirados do cache manualmente"""
@@ -427,9 +1102,12 @@ def cleanup_cache():
     })
 
 @app.route('/api/tarot/cards', methods=['GET'])
+@response_cache.route(current_deck_version, params=('type', 'suit'), cacheable=translation_complete,
+                      bypass=wants_stream)
 def get_cards():
-    """Listar todas as cartas com filtros opcionais"""
-    cards = fetch_all_cards()
+    """Listar todas as cartas com filtros opcionais (?stream=1: uma carta por linha, em NDJSON)"""
+    deck_state = get_deck_state()
+    cards = deck_state.cards if deck_state else []
     
     if not cards:
         return jsonify({"error": "Não foi possível carregar as cartas"}), 503
@@ -443,7 +1121,18 @@ def get_cards():
     if suit:
         filtered_cards = [c for c in filtered_cards if c.get('suit', '').lower() == suit.lower()]
     
-    adapted_cards = [adapt_card_format(card) for card in filtered_cards]
+    table = get_adapted_table(deck_state)
+    
+    if wants_stream():
+        def stream_cards():
+            for chunk in chunked(filtered_cards, STREAM_CHUNK_SIZE):
+                table.prefetch(chunk)
+                for card in chunk:
+                    yield adapt_card_format(card, table=table)
+        return ndjson_response(stream_cards(), {"X-Total-Count": len(filtered_cards)})
+    
+    table.prefetch(filtered_cards)
+    adapted_cards = [adapt_card_format(card, table=table) for card in filtered_cards]
     
     return jsonify({
         "total": len(adapted_cards),
@@ -452,7 +1141,11 @@ def get_cards():
 
 @app.route('/api/tarot/random', methods=['GET'])
 def random_cards():
-    """Tirar cartas aleatórias"""
+    """
+    Tirar cartas aleatórias do baralho local.
+    ?seed=N torna a tirada reproduzível; ?source=remote (ou RANDOM_SOURCE=remote)
+    usa o sorteio da tarotapi.dev.
+    """
     try:
         count = request.args.get('count', '1')
         
@@ -462,165 +1155,164 @@ def random_cards():
         except:
             n = 1
         
-        try:
-            response = requests.get(f"{TAROT_API_URL}/cards/random?n={n}", timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                cards = data.get('cards', [])
-                
-                result = []
-                for card in cards:
-                    position = random.choice(['upright', 'reversed'])
-                    adapted = adapt_card_format(card, position)
-                    result.append(adapted)
-                
-                return jsonify(result)
-        except Exception as e:
-            logger.warning(f"Erro ao buscar da API, usando cache: {e}")
+        seed, rng = request_rng()
+        source = request.args.get('source', RANDOM_SOURCE)
         
-        cards = fetch_all_cards()
-        if not cards:
-            return jsonify({"error": "Sem cartas disponíveis"}), 503
+        result = None
+        if source == 'remote':
+            result = fetch_random_from_api(n, rng)
         
-        selected = random.sample(cards, min(n, len(cards)))
-        result = []
-        for card in selected:
-            position = random.choice(['upright', 'reversed'])
-            result.append(adapt_card_format(card, position))
+        if result is None:
+            cards = fetch_all_cards()
+            if not cards:
+                return jsonify({"error": "Sem cartas disponíveis"}), 503
+            
+            table = get_adapted_table()
+            selected = rng.sample(cards, min(n, len(cards)))
+            if table:
+                table.prefetch(selected)
+            result = [adapt_card_format(card, rng.choice(['upright', 'reversed']), table=table)
+                      for card in selected]
         
-        return jsonify(result)
+        response = jsonify(result)
+        response.headers['X-Random-Seed'] = str(seed)
+        return response
             
     except Exception as e:
         logger.error(f"Erro em random_cards: {e}")
         return jsonify({"error": "Erro ao buscar cartas"}), 500
 
-@app.route('/api/tarot/spread/three', methods=['GET'])
-def three_card_spread():
-    """Tirada de 3 cartas: Passado, Presente, Futuro"""
-    positions = [
-        {"name": "Passado", "meaning": "Influências que já passaram"},
-        {"name": "Presente", "meaning": "Situação atual"},
-        {"name": "Futuro", "meaning": "Tendências futuras"}
-    ]
-    
+def spread_reading(spread_type):
+    """Uma leitura do tipo spread_type (usada pelas rotas de tirada)"""
     try:
         cards = fetch_all_cards()
         if not cards:
             return jsonify({"error": "Sem cartas disponíveis"}), 503
         
-        selected = random.sample(cards, 3)
-        
-        spread = []
-        for i, card in enumerate(selected):
-            position = random.choice(['upright', 'reversed'])
-            adapted = adapt_card_format(card, position)
-            adapted['position_name'] = positions[i]['name']
-            adapted['position_meaning'] = positions[i]['meaning']
-            spread.append(adapted)
+        _, rng = request_rng()
+        table = get_adapted_table()
+        reading = generate_readings(
+            spread_type, cards, rng, 1,
+            lambda card, position: adapt_card_format(card, position, table=table),
+            prefetch=table.prefetch if table else None
+        )[0]
+        reading["spread_type"] = spread_type
         
-        summary = generate_spread_summary(spread, 'three')
-        
-        return jsonify({
-            "cards": spread,
-            "summary": summary,
-            "spread_type": "three"
-        })
+        return jsonify(reading)
         
     except Exception as e:
-        logger.error(f"Erro em three_card_spread: {e}")
+        logger.error(f"Erro na tirada {spread_type}: {e}")
         return jsonify({"error": "Erro ao criar tirada"}), 500
 
+@app.route('/api/tarot/spread/three', methods=['GET'])
+def three_card_spread():
+    """Tirada de 3 cartas: Passado, Presente, Futuro"""
+    return spread_reading('three')
+
 @app.route('/api/tarot/spread/celtic', methods=['GET'])
 def celtic_cross_spread():
     """Tirada da Cruz Celta (10 cartas)"""
-    positions = [
-        {"name": "Presente", "meaning": "A situação atual"},
-        {"name": "Desafio", "meaning": "O que está cruzando/desafiando"},
-        {"name": "Passado", "meaning": "Fundamentos do passado"},
-        {"name": "Futuro", "meaning": "O que se aproxima"},
-        {"name": "Acima", "meaning": "Objetivos ou melhor resultado"},
-        {"name": "Abaixo", "meaning": "Influências inconscientes"},
-        {"name": "Conselho", "meaning": "Como proceder"},
-        {"name": "Influências Externas", "meaning": "Pessoas/eventos ao redor"},
-        {"name": "Esperanças/Medos", "meaning": "Sentimentos internos"},
-        {"name": "Resultado", "meaning": "Resultado final potencial"}
-    ]
-
-    try:
-        cards = fetch_all_cards()
-        if not cards:
-            return jsonify({"error": "Sem cartas disponíveis"}), 503
-        
-        selected = random.sample(cards, min(10, len(cards)))
-
-        spread = []
-        for i, card in enumerate(selected):
-            position = random.choice(['upright', 'reversed'])
-            adapted = adapt_card_format(card, position)
-            adapted['position_name'] = positions[i]['name']
-            adapted['position_meaning'] = positions[i]['meaning']
-            spread.append(adapted)
-
-        summary = generate_spread_summary(spread, 'celtic')
-
-        return jsonify({
-            "cards": spread,
-            "summary": summary,
-            "spread_type": "celtic"
-        })
-
-    except Exception as e:
-        logger.error(f"Erro em celtic_cross_spread: {e}")
-        return jsonify({"error": "Erro ao criar tirada"}), 500
+    return spread_reading('celtic')
 
 @app.route('/api/tarot/spread/love', methods=['GET'])
 def love_spread():
     """Tirada especial para amor/relacionamentos (5 cartas)"""
-    positions = [
-        {"name": "Você", "meaning": "Seus sentimentos atuais"},
-        {"name": "O Outro", "meaning": "Sentimentos da outra pessoa"},
-        {"name": "A Relação", "meaning": "Dinâmica do relacionamento"},
-        {"name": "Desafios", "meaning": "O que precisa ser trabalhado"},
-        {"name": "Potencial", "meaning": "Futuro do relacionamento"}
-    ]
+    return spread_reading('love')
+
+# Limite de leituras por chamada do endpoint em lote
+SPREAD_BATCH_MAX = int(os.getenv('SPREAD_BATCH_MAX', 5000))
+
+@app.route('/api/tarot/spread/batch', methods=['GET', 'POST'])
+def spread_batch():
+    """
+    Várias leituras em uma única chamada.
+    GET  ?type=three,love&count=100&seed=42  (count por tipo)
+    POST {"spreads": [{"type": "three", "count": 100}], "seed": 42}
+    Com ?stream=1 (ou Accept: application/x-ndjson), uma leitura por linha.
+    """
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({"error": "Corpo deve ser um objeto JSON"}), 400
+        requested = data.get('spreads', [])
+        if not isinstance(requested, list):
+            return jsonify({"error": "'spreads' deve ser uma lista"}), 400
+        seed = data.get('seed')
+        if seed is not None and not isinstance(seed, (int, str)):
+            return jsonify({"error": "'seed' deve ser um número ou texto"}), 400
+    else:
+        count = request.args.get('count', '1')
+        requested = [{"type": name.strip(), "count": count}
+                     for name in request.args.get('type', 'three').split(',') if name.strip()]
+        seed = request.args.get('seed')
+    
+    plan = []
+    for item in requested:
+        spread_type = item.get('type') if isinstance(item, dict) else None
+        if spread_type not in BATCH_SPREADS:
+            return jsonify({"error": f"Tipo de tirada inválido: {spread_type}",
+                            "valid_types": list(BATCH_SPREADS)}), 400
+        try:
+            count = max(1, int(item.get('count', 1)))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"Quantidade inválida para {spread_type}"}), 400
+        plan.append((spread_type, count))
+    
+    if not plan:
+        return jsonify({"error": "Nenhuma tirada solicitada"}), 400
+    
+    total = sum(count for _, count in plan)
+    if total > SPREAD_BATCH_MAX:
+        return jsonify({"error": f"Máximo de {SPREAD_BATCH_MAX} leituras por chamada"}), 400
     
     try:
         cards = fetch_all_cards()
         if not cards:
             return jsonify({"error": "Sem cartas disponíveis"}), 503
         
-        selected = random.sample(cards, 5)
+        seed, rng = seeded_rng(seed)
+        table = get_adapted_table()
+        adapt = lambda card, position: adapt_card_format(card, position, table=table)
+        prefetch = table.prefetch if table else None
         
-        spread = []
-        for i, card in enumerate(selected):
-            position = random.choice(['upright', 'reversed'])
-            adapted = adapt_card_format(card, position)
-            adapted['position_name'] = positions[i]['name']
-            adapted['position_meaning'] = positions[i]['meaning']
-            spread.append(adapted)
+        if wants_stream():
+            def stream_readings():
+                for spread_type, count in plan:
+                    for reading in iter_readings(spread_type, cards, rng, count, adapt,
+                                                 prefetch=prefetch, chunk_size=STREAM_CHUNK_SIZE):
+                        reading["spread_type"] = spread_type
+                        yield reading
+            return ndjson_response(stream_readings(), {"X-Random-Seed": seed, "X-Total-Count": total})
         
-        summary = generate_spread_summary(spread, 'love')
+        readings = []
+        for spread_type, count in plan:
+            for reading in generate_readings(spread_type, cards, rng, count, adapt, prefetch=prefetch):
+                reading["spread_type"] = spread_type
+                readings.append(reading)
         
         return jsonify({
-            "cards": spread,
-            "summary": summary,
-            "spread_type": "love"
+            "seed": seed,
+            "total": len(readings),
+            "readings": readings
         })
         
     except Exception as e:
-        logger.error(f"Erro em love_spread: {e}")
-        return jsonify({"error": "Erro ao criar tirada"}), 500
+        logger.error(f"Erro em spread_batch: {e}")
+        return jsonify({"error": "Erro ao criar tiradas"}), 500
 
 @app.route('/api/tarot/card/<string:card_id>', methods=['GET'])
+@response_cache.route(current_deck_version, cacheable=translation_complete)
 def get_card_by_id(card_id):
     """Buscar uma carta específica pelo ID"""
     try:
-        cards = fetch_all_cards()
-        card = next((c for c in cards if c.get('name_short') == card_id), None)
+        deck_state = get_deck_state()
+        if not deck_state:
+            return jsonify({"error": "Sem cartas disponíveis"}), 503
+        
+        card = get_adapted_table(deck_state).get(card_id)
         
         if card:
-            return jsonify(adapt_card_format(card))
+            return jsonify(dict(card))
         
         return jsonify({"error": "Carta não encontrada"}), 404
             
@@ -635,54 +1327,95 @@ def search_cards():
     if not query:
         return jsonify({"error": "Termo de busca não fornecido"}), 400
     
-    cards = fetch_all_cards()
-    if not cards:
+    deck_state = get_deck_state()
+    if not deck_state or not deck_state.cards:
         return jsonify({"error": "Sem dados disponíveis"}), 503
     
-    results = []
+    # Índice invertido (inglês + português, sem acentos, com prefixo)
+    matches = get_search_index(deck_state).search(query)
     
-    for card in cards:
-        name_pt = translate_text(card.get('name', ''))
-        meaning_up_pt = translate_text(card.get('meaning_up', ''))
-        meaning_rev_pt = translate_text(card.get('meaning_rev', ''))
-        desc_pt = translate_text(card.get('desc', ''))
-        
-        if (query in card.get('name', '').lower() or
-            query in card.get('meaning_up', '').lower() or
-            query in card.get('meaning_rev', '').lower() or
-            query in card.get('desc', '').lower() or
-            query in name_pt.lower() or
-            query in meaning_up_pt.lower() or
-            query in meaning_rev_pt.lower() or
-            query in desc_pt.lower()):
-            
-            adapted = adapt_card_format(card)
-            results.append(adapted)
+    table = get_adapted_table(deck_state)
+    selected = [deck_state.cards[doc_id] for doc_id, _ in matches[:20]]
+    table.prefetch(selected)
+    results = [adapt_card_format(card, table=table) for card in selected]
     
     return jsonify({
         "query": query,
-        "total": len(results),
-        "results": results[:20]
+        "total": len(matches),
+        "results": results
     })
 
+# Fuso padrão da carta do dia (ex: America/Sao_Paulo); vazio = fuso do servidor
+DAILY_TIMEZONE = os.getenv('DAILY_TIMEZONE')
+
+def daily_now():
+    """
+    Data/hora atual no fuso da carta do dia (?tz= ou DAILY_TIMEZONE).
+    Retorna (now, tz_name); now é None se o fuso for inválido.
+    """
+    tz_name = request.args.get('tz') or DAILY_TIMEZONE
+    if not tz_name:
+        return datetime.now().astimezone(), None
+    try:
+        return datetime.now(ZoneInfo(tz_name)), tz_name
+    except (ZoneInfoNotFoundError, ValueError):
+        return None, tz_name
+
+def next_midnight(now):
+    return datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=now.tzinfo)
+
+def daily_cache_key():
+    now, tz_name = daily_now()
+    return (str(now.date()) if now else None, tz_name)
+
+def daily_cache_ttl():
+    now, _ = daily_now()
+    return max(1, (next_midnight(now) - now).total_seconds()) if now else 1
+
+def daily_cache_headers():
+    """Cache-Control/Expires até a próxima meia-noite do fuso"""
+    now, _ = daily_now()
+    if now is None:
+        return {}
+    midnight = next_midnight(now)
+    max_age = max(0, int((midnight - now).total_seconds()))
+    return {
+        'Cache-Control': f'public, max-age={max_age}',
+        'Expires': format_datetime(midnight.astimezone(timezone.utc), usegmt=True)
+    }
+
+def pick_daily_card(cards, date):
+    """
+    Sorteia a carta do dia com um gerador isolado semeado pela data
+    (mesmo resultado que o antigo random.seed(str(date)) global).
+    """
+    rng = random.Random(str(date))
+    card = cards[rng.randint(0, len(cards) - 1)]
+    position = rng.choice(['upright', 'reversed'])
+    return card, position
+
 @app.route('/api/tarot/daily', methods=['GET'])
+@response_cache.route(current_deck_version, vary=daily_cache_key,
+                      ttl=daily_cache_ttl, headers=daily_cache_headers,
+                      cacheable=translation_complete)
 def daily_card():
-    """Carta do dia - baseada na data atual"""
-    today = datetime.now().date()
-    random.seed(str(today))
+    """Carta do dia - baseada na data atual (calculada uma vez por dia e fuso)"""
+    now, tz_name = daily_now()
+    if now is None:
+        return jsonify({"error": f"Fuso horário inválido: {tz_name}"}), 400
+    
+    today = now.date()
     
     cards = fetch_all_cards()
     if not cards:
         return jsonify({"error": "Sem dados disponíveis"}), 503
     
-    card_index = random.randint(0, len(cards) - 1)
-    card = cards[card_index]
-    position = random.choice(['upright', 'reversed'])
-    
-    random.seed()
+    card, position = pick_daily_card(cards, today)
     
     adapted = adapt_card_format(card, position)
     adapted['date'] = str(today)
+    if tz_name:
+        adapted['timezone'] = tz_name
     
     return jsonify(adapted)
 
@@ -700,37 +1433,19 @@ def interpret_question():
         if not cards:
             return jsonify({"error": "Sem cartas disponíveis"}), 503
         
-        selected = random.sample(cards, 3)
+        _, rng = request_rng()
+        table = get_adapted_table()
+        reading = generate_readings(
+            'interpret', cards, rng, 1,
+            lambda card, position: adapt_card_format(card, position, table=table),
+            prefetch=table.prefetch if table else None
+        )[0]
         
-        interpretation = {
+        return jsonify({
             "question": question,
-            "cards": [],
-            "summary": ""
-        }
-        
-        for i, card in enumerate(selected):
-            position = random.choice(['upright', 'reversed'])
-            adapted = adapt_card_format(card, position)
-            
-            if i == 0:
-                adapted['role'] = "Fatores que influenciam a situação"
-            elif i == 1:
-                adapted['role'] = "O caminho a seguir"
-            else:
-                adapted['role'] = "Resultado potencial"
-            
-            interpretation['cards'].append(adapted)
-        
-        upright_count = sum(1 for c in interpretation['cards'] if c.get('position') == 'upright')
-        
-        if upright_count >= 2:
-            interpretation['summary'] = "As cartas indicam um caminho favorável para sua questão. Confie no processo."
-        elif upright_count == 1:
-            interpretation['summary'] = "Há aspectos positivos e desafiadores em sua questão. Busque equilíbrio."
-        else:
-            interpretation['summary'] = "Momento de introspecção. Reavalie sua abordagem antes de agir."
-        
-        return jsonify(interpretation)
+            "cards": reading["cards"],
+            "summary": reading["summary"]
+        })
         
     except Exception as e:
         logger.error(f"Erro em interpret_question: {e}")
@@ -740,10 +1455,15 @@ def interpret_question():
 def refresh_cache():
     """Força a atualização do cache de cartas"""
     try:
-        cards = fetch_all_cards(force_refresh=True)
+        deck_state = get_deck_state(force_refresh=True)
+        cards = deck_state.cards if deck_state else []
+        
+        # Respostas serializadas da versão anterior não valem mais
+        response_cache.clear()
         return jsonify({
             "success": True,
-            "cards_count": len(cards) if cards else 0,
+            "cards_count": len(cards),
+            "deck_version": deck_state.version if deck_state else None,
             "cache_stats": cards_cache.get_stats(),
             "message": "Cache atualizado com sucesso"
         })
@@ -751,6 +1471,121 @@ def refresh_cache():
         logger.error(f"Erro ao atualizar cache: {e}")
         return jsonify({"error": "Erro ao atualizar cache"}), 500
 
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    """Perfis guardados: os pedidos mais recentes e os amostrados mais lentos"""
+    if not is_admin():
+        return jsonify({"error": "Não autorizado"}), 403
+    
+    return jsonify({"stats": profiler.get_stats(), **profiler.list()})
+
+@app.route('/api/admin/profiles/<string:profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Um perfil em texto (padrão), pstats (binário) ou pilhas colapsadas (flame graph)"""
+    if not is_admin():
+        return jsonify({"error": "Não autorizado"}), 403
+    
+    record = profiler.get(profile_id)
+    if record is None:
+        return jsonify({"error": "Perfil não encontrado"}), 404
+    
+    output = request.args.get('format', 'text')
+    if output == 'pstats':
+        return record.pstats_bytes(), 200, {
+            'Content-Type': 'application/octet-stream',
+            'Content-Disposition': f'attachment; filename="profile-{record.id}.pstats"'
+        }
+    if output == 'collapsed':
+        return record.collapsed(), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    if output == 'text':
+        sort = request.args.get('sort', 'cumulative')
+        try:
+            return record.text(sort=sort), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+        except KeyError:
+            return jsonify({"error": f"Ordenação inválida: {sort}"}), 400
+    
+    return jsonify({"error": f"Formato inválido: {output}"}), 400
+
+# ========== PRÉ-CARREGAMENTO (PRODUÇÃO) ==========
+
+def warm_up():
+    """
+    Carrega de uma vez o baralho, todas as traduções, a tabela de cartas
+    adaptadas e o índice de busca. Em produção roda no master do gunicorn
+    antes do fork (wsgi.py): os workers já nascem aquecidos e compartilham
+    essa memória (copy-on-write) em vez de cada um montar a sua.
+    """
+    global preloaded_translations
+    
+    started = time.perf_counter()
+    state = get_deck_state()
+    if state is None:
+        logger.warning("Pré-carregamento sem baralho: os workers vão buscar sob demanda")
+        return None
+    
+    # Sem prazo (fora de requisição): espera todas as traduções
+    translations = translate_many(text for card in state.cards for text in card_texts(card))
+    preloaded_translations = MappingProxyType(
+        {text: value for text, value in translations.items() if text not in translations.missing})
+    
+    table = get_adapted_table(state)
+    table.all()
+    get_search_index(state)
+    
+    summary = {
+        "deck_version": state.version,
+        "cards": len(state.cards),
+        "translations": len(preloaded_translations),
+        "untranslated": len(translations.missing),
+        "seconds": round(time.perf_counter() - started, 2)
+    }
+    logger.info(f"Pré-carregamento concluído: {summary}")
+    return summary
+
+def reset_after_fork():
+    """No worker, logo após o fork: nada de conexões nem métricas herdadas do master"""
+    upstream.reset_connections()
+    metrics.reset()
+
+# ========== COMANDOS DE LINHA ==========
+
+deck_cli = AppGroup('deck', help="Gerencia o bundle pré-traduzido do baralho")
+
+@deck_cli.command('build')
+@click.option('--output', default=DECK_BUNDLE_PATH, show_default=True,
+              help="Arquivo de saída do bundle")
+@click.option('--retries', default=2, show_default=True,
+              help="Novas tentativas para os textos que o tradutor não traduziu")
+@click.option('--allow-partial', is_flag=True,
+              help="Grava o bundle sem os textos não traduzidos (traduzidos em execução)")
+def build_deck_command(output, retries, allow_partial):
+    """Busca o baralho na API, traduz todos os campos e grava o bundle"""
+    state = fetch_deck_from_api()
+    if not state:
+        raise click.ClickException("Não foi possível buscar as cartas da API")
+    
+    translations = translate_many(text for card in state.cards for text in card_texts(card))
+    for _ in range(retries):
+        if not translations.missing:
+            break
+        retried = translate_many(translations.missing)
+        translations.update(retried)
+        translations.missing = retried.missing
+    
+    # Texto em inglês no bundle seria servido para sempre (o bundle vem
+    # antes do cache e do store): sem tradução, fica fora ou o build falha
+    if translations.missing and not allow_partial:
+        raise click.ClickException(f"{len(translations.missing)} textos sem tradução; "
+                                   f"tente de novo ou use --allow-partial")
+    bundle = build_bundle(state.cards,
+                          lambda text: None if text in translations.missing else translations.get(text),
+                          source=TAROT_API_URL, etag=state.etag)
+    save_bundle(bundle, output)
+    click.echo(f"Bundle {bundle.version} gravado em {output}: "
+               f"{len(bundle.cards)} cartas, {len(bundle.translations)} traduções")
+
+app.cli.add_command(deck_cli)
+
 if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     
@@ -765,8 +1600,7 @@ if __name__ == '__main__':
     
     # Carregar cache inicial
     with app.app_context():
-        cards = fetch_all_cards()
-        logger.info(f"Cache inicial carregado com {len(cards) if cards else 0} cartas")
+        warm_up()
         logger.info(f"Estatísticas do cache: {cards_cache.get_stats()}")
     
     logger.info(f"Servidor rodando em http://localhost:{port}")
@@ -0,0 +1,333 @@
+import os
+import re
+import json
+import gzip
+import hashlib
+import logging
+
+import click
+
+try:
+    import brotli
+except ImportError:  # opcional: sem ele o build gera só as versões .gz
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_NAME = 'manifest.json'
+
+# Arquivos processados pelo build (caminhos relativos a static/)
+ASSET_FILES = ('script.js', 'style.css')
+
+# Extensão e nome do Content-Encoding de cada versão pré-comprimida,
+# na ordem de preferência
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+# ======================================
+# MINIFICAÇÃO
+# ======================================
+
+CSS_STRING = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+
+
+def minify_css(source):
+    """
+    Minificação conservadora de CSS: tira comentários e espaços que não
+    mudam o significado. Strings ficam intactas.
+    """
+    parts = []
+    last = 0
+    for match in CSS_STRING.finditer(source):
+        parts.append(_minify_css_code(source[last:match.start()]))
+        parts.append(match.group())
+        last = match.end()
+    parts.append(_minify_css_code(source[last:]))
+    return ''.join(parts).strip() + '\n'
+
+
+def _minify_css_code(code):
+    code = CSS_COMMENT.sub('', code)
+    code = re.sub(r'\s+', ' ', code)
+    code = re.sub(r' ?([{};,>]) ?', r'\1', code)
+    code = re.sub(r': ', ':', code)
+    return code.replace(';}', '}')
+
+
+# Palavras após as quais "/" começa uma regex (e não uma divisão)
+JS_REGEX_KEYWORDS = {'return', 'typeof', 'case', 'do', 'else', 'in', 'of', 'new', 'delete',
+                     'void', 'throw', 'instanceof', 'yield', 'await'}
+JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+
+
+def _is_word(char):
+    return char.isalnum() or char in '_$' or ord(char) > 127
+
+
+def minify_js(source):
+    """
+    Minificação conservadora de JavaScript: tira comentários, indentação,
+    linhas em branco e espaços entre símbolos. As quebras de linha são
+    mantidas (o código pode depender da inserção automática de ';') e
+    strings, templates e regex são copiados sem alteração.
+    """
+    out = []
+    pos = _minify_js_code(source, 0, out, in_template=False)
+    if pos < len(source):
+        raise ValueError(f"'}}' sem abertura na posição {pos}")
+    return ''.join(out).strip() + '\n'
+
+
+def _last_significant(out):
+    return ''.join(out[-20:]).rstrip()
+
+
+def _starts_regex(out):
+    tail = _last_significant(out)
+    if not tail:
+        return True
+    if tail[-1] in JS_REGEX_AFTER:
+        return True
+    word = re.search(r'[\w$]+$', tail)
+    return word is not None and word.group() in JS_REGEX_KEYWORDS
+
+
+def _copy_quoted(source, pos, quote):
+    """Copia uma string (ou regex) até o quote de fechamento. Retorna a posição seguinte"""
+    end = pos + 1
+    in_class = False
+    while end < len(source):
+        char = source[end]
+        if char == '\\':
+            end += 2
+            continue
+        if quote == '/' and char == '[':
+            in_class = True
+        elif quote == '/' and char == ']':
+            in_class = False
+        elif char == quote and not in_class:
+            return end + 1
+        elif char == '\n' and quote != '`':
+            break
+        end += 1
+    raise ValueError(f"Literal {quote} não terminado na posição {pos}")
+
+
+def _copy_template(source, pos, out):
+    """Copia um template literal, minificando o código dentro de ${...}"""
+    out.append('`')
+    pos += 1
+    start = pos
+    while pos < len(source):
+        char = source[pos]
+        if char == '\\':
+            pos += 2
+        elif char == '`':
+            out.append(source[start:pos + 1])
+            return pos + 1
+        elif source.startswith('${', pos):
+            out.append(source[start:pos + 2])
+            pos = _minify_js_code(source, pos + 2, out, in_template=True)
+            out.append('}')
+            pos += 1
+            start = pos
+        else:
+            pos += 1
+    raise ValueError("Template literal não terminado")
+
+
+def _minify_js_code(source, pos, out, in_template):
+    """Minifica código a partir de pos; dentro de ${...}, para no '}' que o fecha"""
+    depth = 0
+    length = len(source)
+    while pos < length:
+        char = source[pos]
+
+        # Espaços e comentários: viram nada, um espaço ou uma quebra de linha
+        if char.isspace() or source.startswith('//', pos) or source.startswith('/*', pos):
+            newline = False
+            while pos < length:
+                if source[pos].isspace():
+                    newline = newline or source[pos] == '\n'
+                    pos += 1
+                elif source.startswith('//', pos):
+                    end = source.find('\n', pos)
+                    pos = length if end == -1 else end
+                elif source.startswith('/*', pos):
+                    end = source.find('*/', pos + 2)
+                    if end == -1:
+                        raise ValueError(f"Comentário não terminado na posição {pos}")
+                    newline = newline or '\n' in source[pos:end]
+                    pos = end + 2
+                else:
+                    break
+            previous = _last_significant(out)
+            following = source[pos] if pos < length else ''
+            if not previous or not following:
+                continue
+            if newline:
+                out.append('\n')
+            elif (_is_word(previous[-1]) and _is_word(following)) or \
+                    (previous[-1] in '+-' and following in '+-'):
+                out.append(' ')
+            continue
+
+        if char in '"\'':
+            end = _copy_quoted(source, pos, char)
+            out.append(source[pos:end])
+            pos = end
+        elif char == '`':
+            pos = _copy_template(source, pos, out)
+        elif char == '/' and _starts_regex(out):
+            end = _copy_quoted(source, pos, '/')
+            out.append(source[pos:end])
+            pos = end
+        elif char == '{':
+            depth += 1
+            out.append(char)
+            pos += 1
+        elif char == '}':
+            if depth == 0 and in_template:
+                return pos
+            depth -= 1
+            out.append(char)
+            pos += 1
+        else:
+            # Trecho sem nada especial de uma vez
+            end = pos + 1
+            while end < length and source[end] not in ' \t\r\n"\'`/{}':
+                end += 1
+            out.append(source[pos:end])
+            pos = end
+    return pos
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js,
+}
+
+
+# ======================================
+# BUILD
+# ======================================
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def build_assets(static_dir=STATIC_DIR, dist_dir=DIST_DIR, files=ASSET_FILES):
+    """
+    Minifica cada arquivo, grava com o hash do conteúdo no nome
+    (ex: dist/script.3f2a9c1d0b7e.js), gera as versões .gz e .br ao lado
+    e escreve o manifest com os nomes finais. Retorna o manifest.
+    """
+    os.makedirs(dist_dir, exist_ok=True)
+    assets = {}
+
+    for name in files:
+        with open(os.path.join(static_dir, name), encoding='utf-8') as f:
+            source = f.read()
+
+        stem, ext = os.path.splitext(name)
+        minify = MINIFIERS.get(ext)
+        data = (minify(source) if minify else source).encode('utf-8')
+
+        hashed = f"{stem}.{content_hash(data)}{ext}"
+        path = os.path.join(dist_dir, hashed)
+        variants = {None: data, 'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(data, quality=11)
+
+        encodings = []
+        for encoding, suffix in ((None, ''),) + ENCODINGS:
+            if encoding not in variants:
+                continue
+            with open(path + suffix, 'wb') as f:
+                f.write(variants[encoding])
+            if encoding:
+                encodings.append(encoding)
+
+        relative = os.path.relpath(path, static_dir).replace(os.sep, '/')
+        assets[name] = {
+            "path": relative,
+            "size": len(data),
+            "original_size": len(source.encode('utf-8')),
+            "encodings": encodings
+        }
+
+    manifest = {"assets": assets}
+    with open(os.path.join(dist_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return manifest
+
+
+# ======================================
+# MANIFEST
+# ======================================
+
+class AssetManifest:
+    """
+    Nomes com hash gerados pelo build. Sem manifest (ex: desenvolvimento)
+    os arquivos originais de static/ são usados.
+    """
+
+    def __init__(self, assets=None):
+        self.assets = assets or {}
+        self._by_path = {asset['path']: asset for asset in self.assets.values()}
+
+    @classmethod
+    def load(cls, path=os.path.join(DIST_DIR, MANIFEST_NAME)):
+        try:
+            with open(path, encoding='utf-8') as f:
+                manifest = cls(json.load(f).get('assets', {}))
+        except FileNotFoundError:
+            return cls()
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Manifest de assets inválido em {path}: {e}")
+            return cls()
+
+        logger.info(f"Manifest de assets carregado: {len(manifest.assets)} arquivos")
+        return manifest
+
+    def resolve(self, name):
+        """Caminho (relativo a static/) a usar para name"""
+        asset = self.assets.get(name)
+        return asset['path'] if asset else name
+
+    def lookup(self, path):
+        """Dados do arquivo com hash em path, ou None se não for um deles"""
+        return self._by_path.get(path)
+
+
+# ======================================
+# INSTÂNCIA GLOBAL
+# ======================================
+
+asset_manifest_obj = AssetManifest.load()
+
+
+# ======================================
+# CLI (flask assets build)
+# ======================================
+
+@click.group('assets')
+def assets_cli():
+    """Gera os arquivos estáticos de produção"""
+
+
+@assets_cli.command('build')
+def build_command():
+    """Minifica, põe o hash no nome e pré-comprime script.js e style.css"""
+    manifest = build_assets()
+    for name, asset in manifest['assets'].items():
+        click.echo(f"{name} -> {asset['path']} ({asset['original_size']} -> {asset['size']} bytes, "
+                   f"{', '.join(asset['encodings'])})", err=True)
+    if brotli is None:
+        click.echo("brotli não instalado: versões .br não geradas", err=True)
+    click.echo("Reinicie o servidor para usar o novo manifest", err=True)
@@ -0,0 +1,200 @@
+"""
+Servidor em memória compatível com o subconjunto do protocolo do Redis
+usado pelo cache.RedisCache (GET, MGET, SET com PX/EX, DEL, SCAN, ...).
+Serve para testar e medir CACHE_BACKEND=redis sem um Redis de verdade.
+
+    python bench/fake_redis.py --port 6399
+    CACHE_BACKEND=redis REDIS_URL=redis://127.0.0.1:6399/0 flask run
+"""
+import time
+import fnmatch
+import argparse
+import threading
+import socketserver
+
+
+class FakeRedis:
+    """Dados e comandos (sem rede)"""
+
+    def __init__(self):
+        self._data = {}  # chave -> (valor, expira_em ou None)
+        self._lock = threading.Lock()
+        self.commands = 0
+
+    def _alive(self, key, now):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def execute(self, args):
+        name = args[0].upper().decode()
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        with self._lock:
+            self.commands += 1
+            if handler is None:
+                return Error(f"ERR unknown command '{name}'")
+            try:
+                return handler(time.time(), *args[1:])
+            except (TypeError, ValueError, IndexError):
+                return Error(f"ERR wrong arguments for '{name}'")
+
+    def cmd_ping(self, now, *args):
+        return Simple('PONG')
+
+    def cmd_auth(self, now, *args):
+        return Simple('OK')
+
+    def cmd_select(self, now, db):
+        return Simple('OK')
+
+    def cmd_get(self, now, key):
+        entry = self._alive(key, now)
+        return entry[0] if entry else None
+
+    def cmd_mget(self, now, *keys):
+        return [self.cmd_get(now, key) for key in keys]
+
+    def cmd_set(self, now, key, value, *options):
+        expires_at = None
+        options = [option.upper() for option in options]
+        i = 0
+        while i < len(options):
+            if options[i] == b'PX':
+                expires_at = now + int(options[i + 1]) / 1000
+                i += 2
+            elif options[i] == b'EX':
+                expires_at = now + int(options[i + 1])
+                i += 2
+            elif options[i] == b'NX':
+                if self._alive(key, now):
+                    return None
+                i += 1
+            else:
+                return Error("ERR syntax error")
+        self._data[key] = (value, expires_at)
+        return Simple('OK')
+
+    def cmd_del(self, now, *keys):
+        return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def cmd_exists(self, now, *keys):
+        return sum(1 for key in keys if self._alive(key, now))
+
+    def cmd_pttl(self, now, key):
+        entry = self._alive(key, now)
+        if entry is None:
+            return -2
+        return -1 if entry[1] is None else int((entry[1] - now) * 1000)
+
+    def cmd_dbsize(self, now):
+        return sum(1 for key in list(self._data) if self._alive(key, now))
+
+    def cmd_flushdb(self, now, *args):
+        self._data.clear()
+        return Simple('OK')
+
+    def cmd_scan(self, now, cursor, *options):
+        # Devolve tudo de uma vez (cursor 0), o que o protocolo permite
+        pattern = b'*'
+        for i in range(0, len(options) - 1, 2):
+            if options[i].upper() == b'MATCH':
+                pattern = options[i + 1]
+        keys = [key for key in list(self._data)
+                if self._alive(key, now) and fnmatch.fnmatchcase(key.decode(), pattern.decode())]
+        return [b'0', keys]
+
+
+class Simple(str):
+    pass
+
+
+class Error(str):
+    pass
+
+
+def encode_reply(value):
+    if value is None:
+        return b'$-1\r\n'
+    if isinstance(value, Error):
+        return b'-%s\r\n' % value.encode()
+    if isinstance(value, Simple):
+        return b'+%s\r\n' % value.encode()
+    if isinstance(value, int):
+        return b':%d\r\n' % value
+    if isinstance(value, bytes):
+        return b'$%d\r\n%s\r\n' % (len(value), value)
+    if isinstance(value, list):
+        return b'*%d\r\n' % len(value) + b''.join(encode_reply(item) for item in value)
+    raise TypeError(type(value))
+
+
+def read_command(reader):
+    line = reader.readline()
+    if not line:
+        return None
+    if not line.startswith(b'*'):
+        return line.split()  # comando inline (ex: "PING" via telnet)
+    args = []
+    for _ in range(int(line[1:])):
+        length = int(reader.readline()[1:])
+        args.append(reader.read(length + 2)[:-2])
+    return args
+
+
+class Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class FakeRedisServer:
+    """Servidor TCP com threads em volta de um FakeRedis (porta 0 = livre)"""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.store = FakeRedis()
+        store = self.store
+
+        class Handler(socketserver.StreamRequestHandler):
+            # Sem Nagle: respostas de pipeline não esperam o ACK atrasado do cliente
+            disable_nagle_algorithm = True
+
+            def handle(self):
+                while True:
+                    args = read_command(self.rfile)
+                    if not args:
+                        return
+                    self.wfile.write(encode_reply(store.execute(args)))
+
+        self._server = Server((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Servidor compatível com Redis, em memória")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6399)
+    args = parser.parse_args()
+
+    server = FakeRedisServer(args.host, args.port).start()
+    print(f"Ouvindo em {server.url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
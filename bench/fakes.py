@@ -0,0 +1,128 @@
+"""
+Substitutos locais das dependências externas usados pelo benchmark:
+um servidor falso da tarotapi.dev e um tradutor falso com latência
+configurável.
+"""
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'cards.json')
+
+
+def load_fixture(path=FIXTURE_PATH):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['cards']
+
+
+# ======================================
+# TAROTAPI.DEV FALSA
+# ======================================
+
+class FakeTarotAPI:
+    """
+    Servidor HTTP local que imita /api/v1/cards e /api/v1/cards/random,
+    com ETag e latência artificial por requisição.
+    """
+
+    def __init__(self, cards=None, latency=0.0, host='127.0.0.1', port=0):
+        self.cards = cards if cards is not None else load_fixture()
+        self.latency = latency
+        self.requests = 0
+        body = json.dumps({"nhits": len(self.cards), "cards": self.cards}).encode()
+        self._cards_body = body
+        self._etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def _handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b'', headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                api.requests += 1
+                if api.latency:
+                    time.sleep(api.latency)
+
+                url = urlparse(self.path)
+                if url.path == '/api/v1/cards':
+                    if self.headers.get('If-None-Match') == api._etag:
+                        return self._send(304, headers={'ETag': api._etag})
+                    return self._send(200, api._cards_body, {'ETag': api._etag})
+
+                if url.path == '/api/v1/cards/random':
+                    n = int(parse_qs(url.query).get('n', ['1'])[0])
+                    cards = random.sample(api.cards, max(1, min(n, len(api.cards))))
+                    return self._send(200, json.dumps({"nhits": len(cards), "cards": cards}).encode())
+
+                self._send(404, b'{"error": "not found"}')
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# ======================================
+# TRADUTOR FALSO
+# ======================================
+
+# Marcador entre os textos de um lote (app.TRANSLATE_BATCH_MARKER): como o
+# tradutor real, o falso traduz cada trecho e preserva os marcadores
+BATCH_MARKER_SPLIT = re.compile(r'(\s*@@@\s*)')
+
+
+class FakeTranslator:
+    """
+    Mesmo uso do deep_translator.GoogleTranslator
+    (FakeTranslator(source='en', target='pt').translate(text)).
+    """
+
+    latency = 0.0
+    calls = 0
+    _lock = threading.Lock()
+
+    def __init__(self, source='en', target='pt'):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        with FakeTranslator._lock:
+            FakeTranslator.calls += 1
+        if FakeTranslator.latency:
+            time.sleep(FakeTranslator.latency)
+        parts = BATCH_MARKER_SPLIT.split(text)
+        # Posições pares são os textos, ímpares os marcadores (com os espaços)
+        return ''.join(part if i % 2 else f"[{self.target}] {part}" for i, part in enumerate(parts))
@@ -0,0 +1,87 @@
+"""
+Gera bench/fixtures/cards.json: um baralho de 78 cartas no mesmo
+formato da tarotapi.dev, usado pelo servidor falso do benchmark.
+
+    python bench/make_fixture.py
+"""
+import os
+import json
+import random
+
+MAJORS = [
+    "The Fool", "The Magician", "The High Priestess", "The Empress", "The Emperor",
+    "The Hierophant", "The Lovers", "The Chariot", "Strength", "The Hermit",
+    "Wheel Of Fortune", "Justice", "The Hanged Man", "Death", "Temperance",
+    "The Devil", "The Tower", "The Star", "The Moon", "The Sun", "Judgement", "The World"
+]
+SUITS = ["wands", "cups", "swords", "pentacles"]
+RANKS = [
+    ("ace", "Ace"), ("two", "Two"), ("three", "Three"), ("four", "Four"), ("five", "Five"),
+    ("six", "Six"), ("seven", "Seven"), ("eight", "Eight"), ("nine", "Nine"), ("ten", "Ten"),
+    ("page", "Page"), ("knight", "Knight"), ("queen", "Queen"), ("king", "King")
+]
+KEYWORDS = [
+    "love", "change", "work", "money", "travel", "home", "success", "loss", "hope", "fear",
+    "wisdom", "courage", "patience", "conflict", "balance", "victory", "delay", "new beginnings",
+    "intuition", "abundance", "betrayal", "harmony", "ambition", "healing", "freedom", "doubt"
+]
+SENTENCES = [
+    "A figure stands beneath a wide sky, holding the symbol of the suit.",
+    "The landscape behind suggests a journey that has only just begun.",
+    "Mountains in the distance speak of challenges still to be faced.",
+    "Water flows at the feet of the figure, a sign of emotion and renewal.",
+    "The colours of the card are warm and the mood is one of quiet confidence.",
+    "Some readers see in this card a warning against haste and pride.",
+    "Others read it as an invitation to trust the slow work of time.",
+    "In a reading it often points to decisions about home, work or love."
+]
+
+
+def meaning(rng):
+    return ", ".join(rng.sample(KEYWORDS, rng.randint(4, 8))).capitalize() + "."
+
+
+def description(rng):
+    return " ".join(rng.choice(SENTENCES) for _ in range(rng.randint(3, 12)))
+
+
+def build_deck(seed=78):
+    rng = random.Random(seed)
+    cards = []
+
+    for value, name in enumerate(MAJORS):
+        cards.append({
+            "type": "major",
+            "name_short": f"ar{value:02d}",
+            "name": name,
+            "value": str(value),
+            "value_int": value,
+            "meaning_up": meaning(rng),
+            "meaning_rev": meaning(rng),
+            "desc": description(rng)
+        })
+
+    for suit in SUITS:
+        for value_int, (value, rank) in enumerate(RANKS, start=1):
+            short = {"ace": "ac", "page": "pa", "knight": "kn", "queen": "qu", "king": "ki"}.get(value, f"{value_int:02d}")
+            cards.append({
+                "type": "minor",
+                "name_short": f"{suit[:2]}{short}",
+                "name": f"{rank} of {suit.title()}",
+                "value": value,
+                "value_int": value_int,
+                "suit": suit,
+                "meaning_up": meaning(rng),
+                "meaning_rev": meaning(rng),
+                "desc": description(rng)
+            })
+
+    return cards
+
+
+if __name__ == '__main__':
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'cards.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"nhits": 78, "cards": build_deck()}, f, ensure_ascii=False, indent=1)
+        f.write("\n")
+    print(f"Fixture gravada em {path}")
@@ -0,0 +1,306 @@
+"""
+Benchmark dos endpoints da API, sem rede externa.
+
+Sobe uma tarotapi.dev falsa (bench/fixtures/cards.json), troca o
+GoogleTranslator por um tradutor falso com latência configurável e mede
+cada rota do app.py pelo test client do Flask e por um servidor WSGI real:
+latência com cache frio e, com cache quente, throughput e p50/p95/p99.
+
+    python bench/run_bench.py
+    python bench/run_bench.py --requests 500 --concurrency 16 --translator-latency-ms 80
+    python bench/run_bench.py --compare bench/results/<anterior>.json
+    python bench/run_bench.py --cache-backend redis   # cache compartilhado (servidor falso)
+
+Os resultados são gravados em JSON (bench/results/ por padrão) para
+comparar execuções e detectar regressões.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fakes import FakeTarotAPI, FakeTranslator  # noqa: E402
+from fake_redis import FakeRedisServer  # noqa: E402
+from health import percentile  # noqa: E402
+
+# (nome, método, caminho, corpo JSON)
+ROUTES = [
+    ("cards", "GET", "/api/tarot/cards", None),
+    ("cards_filtered", "GET", "/api/tarot/cards?type=minor&suit=cups", None),
+    ("cards_stream", "GET", "/api/tarot/cards?stream=1", None),
+    ("card", "GET", "/api/tarot/card/ar01", None),
+    ("random", "GET", "/api/tarot/random?count=3", None),
+    ("spread_three", "GET", "/api/tarot/spread/three", None),
+    ("spread_celtic", "GET", "/api/tarot/spread/celtic", None),
+    ("spread_love", "GET", "/api/tarot/spread/love", None),
+    ("spread_batch", "GET", "/api/tarot/spread/batch?type=three,celtic,love&count=50", None),
+    ("spread_batch_stream", "GET", "/api/tarot/spread/batch?type=three,celtic,love&count=50&stream=1", None),
+    ("search", "GET", "/api/tarot/search?q=love", None),
+    ("daily", "GET", "/api/tarot/daily", None),
+    ("interpret", "POST", "/api/tarot/interpret", {"question": "Vou mudar de emprego?"}),
+    ("status", "GET", "/api/status", None),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark dos endpoints da API de tarot")
+    parser.add_argument('--requests', type=int, default=200, help="requisições por rota (cache quente)")
+    parser.add_argument('--concurrency', type=int, default=8, help="requisições simultâneas")
+    parser.add_argument('--translator-latency-ms', type=float, default=50.0)
+    parser.add_argument('--upstream-latency-ms', type=float, default=30.0)
+    parser.add_argument('--mode', choices=['test_client', 'wsgi', 'both'], default='both')
+    parser.add_argument('--cache-backend', choices=['memory', 'redis'], default='memory',
+                        help="redis sobe um servidor compatível local (bench/fake_redis.py)")
+    parser.add_argument('--routes', help="lista de rotas separadas por vírgula (padrão: todas)")
+    parser.add_argument('--output', help="arquivo JSON de saída (padrão: bench/results/<data>.json)")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--threshold', type=float, default=20.0,
+                        help="piora percentual de p95/throughput considerada regressão")
+    return parser.parse_args()
+
+
+# ======================================
+# AMBIENTE
+# ======================================
+
+def setup_app(api, workdir, redis=None):
+    """Configura o ambiente antes de importar o app (que lê tudo no import)"""
+    os.environ['TAROT_API_URL'] = api.base_url
+    os.environ['CACHE_BACKEND'] = 'redis' if redis else 'memory'
+    if redis:
+        os.environ['REDIS_URL'] = redis.url
+    os.environ['TRANSLATION_STORE_PATH'] = os.path.join(workdir, 'translations.db')
+    os.environ['DECK_BUNDLE_PATH'] = os.path.join(workdir, 'sem-bundle.json')
+    os.environ['HEALTH_PROBE_INTERVAL'] = '0'
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    import app as app_module
+    app_module.GoogleTranslator = FakeTranslator
+    return app_module
+
+
+def reset_caches(app_module, workdir):
+    """Volta ao estado de cache frio (como um cold start)"""
+    from deck import clear_derived
+    from translation_store import TranslationStore
+
+    app_module.cards_cache.clear()
+    app_module.translation_cache.clear()
+    app_module.response_cache.clear()
+    clear_derived()
+
+    fd, path = tempfile.mkstemp(dir=workdir, suffix='.db')
+    os.close(fd)
+    os.unlink(path)
+    app_module.translation_store = TranslationStore(path=path)
+
+
+# ======================================
+# CLIENTES
+# ======================================
+
+def test_client_caller(app_module):
+    thread_data = threading.local()
+
+    def call(method, path, body):
+        # O test client não é thread-safe; cada thread usa o seu
+        client = getattr(thread_data, 'client', None)
+        if client is None:
+            client = thread_data.client = app_module.app.test_client()
+        # buffered: lê o corpo inteiro (respostas em streaming também)
+        return client.open(path, method=method, json=body, buffered=True).status_code
+
+    return call, lambda: None
+
+
+def wsgi_caller(app_module):
+    import requests
+    from werkzeug.serving import make_server
+
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+    thread_data = threading.local()
+
+    def call(method, path, body):
+        session = getattr(thread_data, 'session', None)
+        if session is None:
+            session = thread_data.session = requests.Session()
+        response = session.request(method, base_url + path, json=body, timeout=60)
+        return response.status_code
+
+    def stop():
+        server.shutdown()
+
+    return call, stop
+
+
+# ======================================
+# MEDIÇÃO
+# ======================================
+
+def timed(call, method, path, body):
+    started = time.perf_counter()
+    status = call(method, path, body)
+    return (time.perf_counter() - started) * 1000, status
+
+
+def run_warm(call, method, path, body, total, concurrency):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: timed(call, method, path, body), range(total)))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(ms for ms, _ in results)
+    errors = sum(1 for _, status in results if status >= 500)
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(total / wall, 1),
+        "mean_ms": round(sum(latencies) / len(latencies), 3),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3)
+    }
+
+
+def bench_mode(mode, app_module, api, workdir, routes, args):
+    call, stop = test_client_caller(app_module) if mode == 'test_client' else wsgi_caller(app_module)
+    results = {}
+
+    try:
+        for name, method, path, body in routes:
+            reset_caches(app_module, workdir)
+            api_before = api.requests
+            translator_before = FakeTranslator.calls
+
+            cold_ms, cold_status = timed(call, method, path, body)
+            cold = {
+                "ms": round(cold_ms, 3),
+                "status": cold_status,
+                "upstream_calls": api.requests - api_before,
+                "translator_calls": FakeTranslator.calls - translator_before
+            }
+
+            warm = run_warm(call, method, path, body, args.requests, args.concurrency)
+            results[name] = {"cold": cold, "warm": warm}
+
+            print(f"  {name:<16} cold {cold['ms']:>9.1f} ms "
+                  f"({cold['translator_calls']:>3} traduções) | "
+                  f"{warm['throughput_rps']:>8.1f} req/s  "
+                  f"p50 {warm['p50_ms']:>7.2f}  p95 {warm['p95_ms']:>7.2f}  p99 {warm['p99_ms']:>7.2f} ms"
+                  + (f"  [{warm['errors']} erros]" if warm['errors'] else ""))
+    finally:
+        stop()
+
+    return results
+
+
+# ======================================
+# COMPARAÇÃO
+# ======================================
+
+def compare(previous, current, threshold):
+    """Lista as rotas em que p95 ou throughput pioraram mais que threshold%"""
+    regressions = []
+    for mode, routes in current["results"].items():
+        for name, result in routes.items():
+            before = previous.get("results", {}).get(mode, {}).get(name)
+            if not before:
+                continue
+            old, new = before["warm"], result["warm"]
+
+            p95_change = (new["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 if old["p95_ms"] else 0
+            rps_change = (new["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100 if old["throughput_rps"] else 0
+            flag = p95_change > threshold or rps_change < -threshold
+
+            print(f"  {mode:<11} {name:<16} p95 {old['p95_ms']:>8.2f} -> {new['p95_ms']:>8.2f} ms ({p95_change:+6.1f}%)  "
+                  f"req/s {old['throughput_rps']:>8.1f} -> {new['throughput_rps']:>8.1f} ({rps_change:+6.1f}%)"
+                  + ("  << REGRESSÃO" if flag else ""))
+            if flag:
+                regressions.append((mode, name))
+    return regressions
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+
+    routes = ROUTES
+    if args.routes:
+        wanted = set(args.routes.split(','))
+        routes = [route for route in ROUTES if route[0] in wanted]
+
+    workdir = tempfile.mkdtemp(prefix='tarot-bench-')
+    api = FakeTarotAPI(latency=args.upstream_latency_ms / 1000).start()
+    FakeTranslator.latency = args.translator_latency_ms / 1000
+
+    redis = FakeRedisServer().start() if args.cache_backend == 'redis' else None
+    app_module = setup_app(api, workdir, redis)
+    modes = ['test_client', 'wsgi'] if args.mode == 'both' else [args.mode]
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "translator_latency_ms": args.translator_latency_ms,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "cache_backend": args.cache_backend
+        },
+        "results": {}
+    }
+
+    try:
+        for mode in modes:
+            print(f"\n== {mode} ==")
+            report["results"][mode] = bench_mode(mode, app_module, api, workdir, routes, args)
+    finally:
+        api.stop()
+        if redis:
+            redis.stop()
+
+    output = args.output or os.path.join(
+        BENCH_DIR, 'results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResultados gravados em {output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        print(f"\n== comparação com {args.compare} ==")
+        regressions = compare(previous, report, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressões acima de {args.threshold}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
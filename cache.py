@@ -1,152 +1,812 @@
+import os
+import sys
+import json
 import time
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
 
-class SimpleCache:
+from timing import timed
+from resp_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+def deep_sizeof(obj, _seen=None):
+    """Tamanho aproximado em bytes de obj e de tudo o que ele referencia"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, Mapping):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_sizeof(vars(obj), seen)
+    return size
+
+
+class LRUCache:
     """
-    Cache simples compatível com ambiente serverless (Vercel)
+    Cache LRU com TTL por entrada, compatível com ambiente serverless (Vercel)
     OBS: o cache vive apenas durante a execução da função.
+
+    get/set/delete e a remoção do item menos usado são O(1): as entradas
+    ficam em um OrderedDict na ordem de uso (leituras movem a chave para o fim).
+    Seguro para uso com múltiplas threads (Flask threaded / gunicorn gthread).
+
+    Com stale_ttl, a entrada expirada continua disponível via get_stale()
+    por mais stale_ttl segundos (stale-while-revalidate).
+
+    O tamanho de cada entrada é medido (sizeof) e o total é limitado por
+    maxbytes e/ou pelo número de itens (maxsize); None desativa o limite.
     """
 
-    def __init__(self, maxsize=100, ttl=3600):
+    def __init__(self, maxsize=100, ttl=3600, maxbytes=None, sizeof=deep_sizeof):
         self.maxsize = maxsize
+        self.maxbytes = maxbytes
         self.ttl = ttl
-        self._cache = {}
-        self._timestamps = {}
+        self.sizeof = sizeof
+        self._cache = OrderedDict()  # key -> (value, expires_at, stale_until, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._stale_hits = 0
+        self._rejections = 0
 
     # ======================
     # GET
     # ======================
     def get(self, key):
-        if key not in self._cache:
-            return None
+        with self._lock:
+            self._record_access(key)
+            entry = self._cache.get(key)
 
-        age = time.time() - self._timestamps.get(key, 0)
+            if entry is None:
+                self._misses += 1
+                return None
 
-        if age >= self.ttl:
-            self._delete(key)
-            return None
+            now = time.time()
+            if entry[1] <= now:
+                if entry[2] <= now:
+                    self._remove(key)
+                    self._expirations += 1
+                self._misses += 1
+                return None
+
+            self._cache.move_to_end(key)
+            self._hits += 1
+            return entry[0]
 
-        return self._cache[key]
+    def _record_access(self, key):
+        # Gancho para políticas de admissão (chamado com o lock adquirido)
+        pass
 
     # ======================
     # SET
     # ======================
-    def set(self, key, value):
-        if len(self._cache) >= self.maxsize and key not in self._cache:
+    def set(self, key, value, ttl=None, stale_ttl=0):
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        stale_until = expires_at + (stale_ttl or 0)
+        size = self.sizeof(key) + self.sizeof(value) if self.sizeof else 0
+
+        with self._lock:
+            if key in self._cache:
+                # Atualização de uma chave existente não passa pela admissão,
+                # mas um valor maior que maxbytes é recusado (e a chave sai)
+                self._remove(key)
+                if not LRUCache._make_room(self, key, size):
+                    self._rejections += 1
+                    return False
+            elif not self._make_room(key, size):
+                self._rejections += 1
+                return False
+
+            self._cache[key] = (value, expires_at, stale_until, size)
+            self._bytes += size
+        return True
+
+    def _over_budget(self, size, extra_items=1):
+        if self.maxsize is not None and len(self._cache) + extra_items > self.maxsize:
+            return True
+        return self.maxbytes is not None and self._bytes + size > self.maxbytes
+
+    def _make_room(self, key, size):
+        """Libera espaço para uma entrada nova. False recusa a entrada (chamado com o lock)"""
+        if self.maxbytes is not None and size > self.maxbytes:
+            return False
+        while self._cache and self._over_budget(size):
             self._remove_oldest()
+        return True
 
-        self._cache[key] = value
-        self._timestamps[key] = time.time()
+    # ======================
+    # EM LOTE
+    # ======================
+    def get_many(self, keys):
+        """dict chave -> valor, só com as chaves encontradas"""
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set_many(self, items, ttl=None, stale_ttl=0):
+        for key, value in items:
+            self.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
         return True
 
     # ======================
     # DELETE
     # ======================
     def delete(self, key):
-        return self._delete(key)
+        with self._lock:
+            self._remove(key)
+        return True
+
+    def _remove(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[3]
+        return entry
 
-    def _delete(self, key):
-        self._cache.pop(key, None)
-        self._timestamps.pop(key, None)
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._bytes = 0
         return True
 
     # ======================
     # REMOVE OLDEST
     # ======================
     def _remove_oldest(self):
-        if not self._timestamps:
-            return
-
-        oldest_key = min(
-            self._timestamps,
-            key=self._timestamps.get
-        )
-        self._delete(oldest_key)
+        # Chamado com o lock adquirido
+        if self._cache:
+            _, entry = self._cache.popitem(last=False)
+            self._bytes -= entry[3]
+            self._evictions += 1
 
     # ======================
     # CLEAN EXPIRED
     # ======================
     def cleanup_expired(self):
-        removed = 0
         now = time.time()
 
-        for key in list(self._timestamps.keys()):
-            if now - self._timestamps[key] >= self.ttl:
-                self._delete(key)
-                removed += 1
+        with self._lock:
+            expired = [key for key, entry in self._cache.items() if entry[2] <= now]
+            for key in expired:
+                self._remove(key)
+            self._expirations += len(expired)
+
+        return len(expired)
+
+    # ======================
+    # PEEK
+    # ======================
+    def peek(self, key):
+        """Lê sem alterar a ordem LRU nem as estatísticas"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[1] <= time.time():
+                return None
+            return entry[0]
 
-        return removed
+    def get_stale(self, key):
+        """Retorna o valor mesmo expirado, enquanto estiver na janela de stale"""
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None or entry[2] <= time.time():
+                return None
+            if entry[1] <= time.time():
+                self._stale_hits += 1
+            return entry[0]
 
     # ======================
     # KEYS
     # ======================
     def get_all_keys(self):
-        return list(self._cache.keys())
+        with self._lock:
+            return list(self._cache.keys())
+
+    def __len__(self):
+        return len(self._cache)
 
     # ======================
     # STATS
     # ======================
     def get_stats(self):
-        return {
-            "total_items": len(self._cache),
-            "maxsize": self.maxsize,
-            "ttl_seconds": self.ttl
-        }
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "total_items": len(self._cache),
+                "maxsize": self.maxsize,
+                "bytes": self._bytes,
+                "maxbytes": self.maxbytes,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "rejections": self._rejections,
+                "expirations": self._expirations,
+                "stale_hits": self._stale_hits
+            }
+
+
+# ======================================
+# ADMISSÃO POR FREQUÊNCIA (TinyLFU)
+# ======================================
+
+class FrequencySketch:
+    """
+    Count-min sketch com contadores de 4 bits: estima quantas vezes cada
+    chave foi pedida recentemente usando memória fixa. A cada sample_size
+    registros todos os contadores são divididos por 2 (envelhecimento),
+    para que a popularidade antiga vá perdendo peso.
+    """
+
+    DEPTH = 4
+    MAX_COUNT = 15
+    SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0x27D4EB2F165667C5)
+
+    def __init__(self, width=4096, sample_factor=10):
+        self.width = 1 << max(4, (width - 1).bit_length())
+        self._mask = self.width - 1
+        self._table = bytearray(self.DEPTH * self.width)
+        self.sample_size = sample_factor * self.width
+        self._additions = 0
+        self.resets = 0
+
+    def _indexes(self, key):
+        h = hash(key)
+        for row, seed in enumerate(self.SEEDS):
+            mixed = ((h ^ seed) * 0x2545F4914F6CDD1D) & 0xFFFFFFFFFFFFFFFF
+            yield row * self.width + ((mixed >> 32) & self._mask)
+
+    def increment(self, key):
+        table = self._table
+        for index in self._indexes(key):
+            if table[index] < self.MAX_COUNT:
+                table[index] += 1
+
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._table = bytearray(count >> 1 for count in table)
+            self._additions //= 2
+            self.resets += 1
+
+    def estimate(self, key):
+        table = self._table
+        return min(table[index] for index in self._indexes(key))
+
+
+class TinyLFUCache(LRUCache):
+    """
+    LRUCache com admissão TinyLFU: quando falta espaço, uma chave nova só
+    entra se for pedida com mais frequência que as entradas que teria de
+    tirar (as menos usadas recentemente). Textos pedidos uma única vez não
+    conseguem expulsar o vocabulário do baralho, que é pedido sempre.
+    """
+
+    def __init__(self, maxsize=None, ttl=3600, maxbytes=None, sizeof=deep_sizeof, sketch_width=4096):
+        super().__init__(maxsize=maxsize, ttl=ttl, maxbytes=maxbytes, sizeof=sizeof)
+        self.sketch = FrequencySketch(sketch_width)
+
+    def _record_access(self, key):
+        self.sketch.increment(key)
+
+    def _make_room(self, key, size):
+        if self.maxbytes is not None and size > self.maxbytes:
+            return False
+
+        # Vítimas em ordem LRU até caber; expiradas saem sem disputa
+        now = time.time()
+        candidate = self.sketch.estimate(key)
+        victims = []
+        freed_bytes = 0
+        for victim_key, entry in self._cache.items():
+            if not self._over_budget(size - freed_bytes, 1 - len(victims)):
+                break
+            if entry[2] > now and self.sketch.estimate(victim_key) >= candidate:
+                return False
+            victims.append(victim_key)
+            freed_bytes += entry[3]
+
+        for victim_key in victims:
+            self._remove(victim_key)
+            self._evictions += 1
+        return True
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats["admission"] = "tinylfu"
+        stats["sketch_resets"] = self.sketch.resets
+        return stats
+
+
+# ======================================
+# BACKEND COMPARTILHADO (protocolo do Redis)
+# ======================================
+
+# Tipos (namedtuples) que podem ir para o cache compartilhado, além de
+# str, números, listas e dicts: nome -> (classe, função que reconstrói)
+JSON_TYPES = {}
+
+
+def register_json_type(name, cls, build=None):
+    """Permite gravar cls no RedisCache; build(dict de campos) reconstrói o valor na leitura"""
+    JSON_TYPES[name] = (cls, build or (lambda fields: cls(**fields)))
+
+
+def encode_value(value):
+    for name, (cls, _) in JSON_TYPES.items():
+        if type(value) is cls:
+            return {"__type__": name, "fields": {field: encode_value(item)
+                                                 for field, item in value._asdict().items()}}
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, Mapping):
+        return {key: encode_value(item) for key, item in value.items()}
+    return value
+
+
+def decode_value(value):
+    if isinstance(value, list):
+        return [decode_value(item) for item in value]
+    if isinstance(value, dict):
+        if "__type__" in value:
+            _, build = JSON_TYPES[value["__type__"]]
+            return build({field: decode_value(item) for field, item in value["fields"].items()})
+        return {key: decode_value(item) for key, item in value.items()}
+    return value
+
+
+class RedisCache:
+    """
+    Cache num servidor compatível com o Redis, compartilhado por todos os
+    workers e instâncias. Mesma interface do LRUCache (get, set, get_stale,
+    get_many, set_many...), com as chaves sob prefix.
+
+    Os valores são gravados em JSON junto com a validade e a janela de
+    stale; o servidor apaga a chave no fim da janela (PX). Só dados: str,
+    números, listas, dicts e os tipos de register_json_type (ex: DeckState).
+
+    Com o servidor fora do ar, tudo vira miss (e set não faz nada) por
+    retry_after segundos, sem travar as requisições.
+    """
+
+    def __init__(self, client, prefix='tarot:', ttl=3600, retry_after=5):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._down_until = 0
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._errors = 0
+        self._roundtrips = 0
+
+    def _key(self, key):
+        return f"{self.prefix}{key}"
+
+    def _pipeline(self, commands):
+        """Executa os comandos; None se o servidor estiver indisponível"""
+        if time.time() < self._down_until:
+            return None
+        try:
+            replies = self.client.pipeline(commands)
+        except Exception as e:
+            logger.warning(f"Cache compartilhado indisponível ({e}), usando só a memória local")
+            with self._lock:
+                self._errors += 1
+            self._down_until = time.time() + self.retry_after
+            return None
+        with self._lock:
+            self._roundtrips += 1
+        return replies
+
+    # ======================
+    # GET
+    # ======================
+    def get_entries(self, keys):
+        """dict chave -> (valor, expires_at, stale_until), ainda na janela de stale"""
+        keys = list(keys)
+        if not keys:
+            return {}
+        replies = self._pipeline([('MGET',) + tuple(self._key(key) for key in keys)])
+        if not replies or not isinstance(replies[0], list):
+            return {}
+
+        now = time.time()
+        entries = {}
+        for key, raw in zip(keys, replies[0]):
+            if raw is None:
+                continue
+            try:
+                value, expires_at, stale_until = json.loads(raw)
+                entry = (decode_value(value), expires_at, stale_until)
+            except Exception as e:
+                logger.warning(f"Entrada inválida no cache compartilhado ({key}): {e}")
+                continue
+            if entry[2] > now:
+                entries[key] = entry
+        return entries
+
+    def get_many(self, keys):
+        keys = list(keys)
+        now = time.time()
+        found = {key: entry[0] for key, entry in self.get_entries(keys).items() if entry[1] > now}
+        with self._lock:
+            self._hits += len(found)
+            self._misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def peek(self, key):
+        entry = self.get_entries([key]).get(key)
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+
+    def get_stale(self, key):
+        entry = self.get_entries([key]).get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            with self._lock:
+                self._stale_hits += 1
+        return entry[0]
+
+    # ======================
+    # SET
+    # ======================
+    def set_many(self, items, ttl=None, stale_ttl=0):
+        expires_in = self.ttl if ttl is None else ttl
+        now = time.time()
+        commands = []
+        for key, value in items:
+            try:
+                payload = json.dumps([encode_value(value), now + expires_in,
+                                      now + expires_in + (stale_ttl or 0)], ensure_ascii=False)
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Valor não serializável para o cache compartilhado ({key}): {e}")
+                continue
+            keep_ms = max(1, int((expires_in + (stale_ttl or 0)) * 1000))
+            commands.append(('SET', self._key(key), payload.encode(), 'PX', keep_ms))
+        return self._pipeline(commands) is not None if commands else True
+
+    def set(self, key, value, ttl=None, stale_ttl=0):
+        return self.set_many([(key, value)], ttl=ttl, stale_ttl=stale_ttl)
+
+    # ======================
+    # DELETE / KEYS
+    # ======================
+    def delete(self, key):
+        self._pipeline([('DEL', self._key(key))])
+        return True
+
+    def _scan(self):
+        cursor = '0'
+        while True:
+            replies = self._pipeline([('SCAN', cursor, 'MATCH', f"{self.prefix}*", 'COUNT', 500)])
+            if not replies or not isinstance(replies[0], list):
+                return
+            cursor, keys = replies[0]
+            for key in keys:
+                yield key.decode()[len(self.prefix):]
+            if cursor in (b'0', '0'):
+                return
+
+    def clear(self):
+        keys = list(self._scan())
+        for start in range(0, len(keys), 500):
+            self._pipeline([('DEL',) + tuple(self._key(key) for key in keys[start:start + 500])])
+        return True
+
+    def cleanup_expired(self):
+        # O servidor remove as chaves sozinho (PX)
+        return 0
+
+    def get_all_keys(self):
+        return list(self._scan())
+
+    def __len__(self):
+        return sum(1 for _ in self._scan())
+
+    # ======================
+    # STATS
+    # ======================
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": "redis",
+                "server": f"{self.client.host}:{self.client.port}/{self.client.db}",
+                "prefix": self.prefix,
+                "ttl_seconds": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+                "stale_hits": self._stale_hits,
+                "roundtrips": self._roundtrips,
+                "errors": self._errors,
+                "available": time.time() >= self._down_until
+            }
+
+
+class TieredCache:
+    """
+    Cache local (L1, validade curta) na frente de um cache compartilhado (L2).
+
+    Leituras tentam o L1 e só vão ao L2 no miss, trazendo o valor para o
+    L1 por no máximo l1_ttl segundos; escritas vão para os dois. Assim a
+    maioria das leituras não sai do processo e, em poucos segundos, uma
+    atualização feita por outro worker aparece em todos.
+    """
+
+    def __init__(self, l1, l2, l1_ttl=5):
+        self.l1 = l1
+        self.l2 = l2
+        self.l1_ttl = l1_ttl
+        self.ttl = l2.ttl
+        self._lock = threading.Lock()
+        self._l2_hits = 0
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = self.l1.get_many(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            remote = self.l2.get_many(missing)
+            if remote:
+                with self._lock:
+                    self._l2_hits += len(remote)
+                for key, value in remote.items():
+                    self.l1.set(key, value, ttl=self.l1_ttl)
+                found.update(remote)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def peek(self, key):
+        value = self.l1.peek(key)
+        return value if value is not None else self.l2.peek(key)
+
+    def get_stale(self, key):
+        value = self.l1.peek(key)
+        return value if value is not None else self.l2.get_stale(key)
+
+    def set(self, key, value, ttl=None, stale_ttl=0):
+        self.l1.set(key, value, ttl=min(self.l1_ttl, self.ttl if ttl is None else ttl))
+        return self.l2.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+
+    def set_many(self, items, ttl=None, stale_ttl=0):
+        items = list(items)
+        self.l1.set_many(items, ttl=min(self.l1_ttl, self.ttl if ttl is None else ttl))
+        return self.l2.set_many(items, ttl=ttl, stale_ttl=stale_ttl)
+
+    def delete(self, key):
+        self.l1.delete(key)
+        return self.l2.delete(key)
+
+    def clear(self):
+        self.l1.clear()
+        return self.l2.clear()
+
+    def cleanup_expired(self):
+        return self.l1.cleanup_expired()
+
+    def get_all_keys(self):
+        return self.l2.get_all_keys()
+
+    def __len__(self):
+        return len(self.l2)
+
+    def get_stats(self):
+        # Mesmas chaves do LRUCache (acertos somando L1 e L2), mais os detalhes
+        l1 = self.l1.get_stats()
+        l2 = self.l2.get_stats()
+        with self._lock:
+            l2_hits = self._l2_hits
+        hits = l1["hits"] + l2_hits
+        lookups = l1["hits"] + l1["misses"]
+        stats = dict(l1)
+        stats.update({
+            "backend": "tiered",
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "l1": l1,
+            "l2": l2
+        })
+        return stats
+
+
+def make_cache(name, local, backend=None, url=None, l1_ttl=None):
+    """
+    Cache name conforme CACHE_BACKEND: 'memory' (padrão) usa só o cache
+    local; 'redis' põe o local como L1 na frente do servidor em REDIS_URL.
+    """
+    backend = backend or os.getenv('CACHE_BACKEND', 'memory')
+    if backend == 'memory':
+        return local
+    if backend != 'redis':
+        logger.warning(f"CACHE_BACKEND desconhecido: {backend}, usando memória")
+        return local
+
+    client = RedisClient(url or os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+                         timeout=float(os.getenv('REDIS_TIMEOUT', 0.5)))
+    shared = RedisCache(client, prefix=f"{os.getenv('CACHE_PREFIX', 'tarot')}:{name}:", ttl=local.ttl)
+    return TieredCache(local, shared,
+                       l1_ttl=l1_ttl if l1_ttl is not None else float(os.getenv('CACHE_L1_TTL', 5)))
+
+
+# Nome antigo mantido por compatibilidade
+SimpleCache = LRUCache
 
 
 # ======================================
 # INSTÂNCIAS GLOBAIS
 # ======================================
 
-cards_cache_obj = SimpleCache(maxsize=10, ttl=300)
-translation_cache_obj = SimpleCache(maxsize=200, ttl=3600)
+# Com CACHE_BACKEND=redis, estes caches locais viram o L1 de um cache compartilhado
+cards_cache_obj = make_cache('cards', LRUCache(maxsize=10, ttl=300))
+
+# Limitado por memória (o baralho inteiro são ~400 textos) e com admissão
+# por frequência, para uma busca rara não expulsar as traduções das cartas
+translation_cache_obj = make_cache('translations', TinyLFUCache(
+    maxsize=None,
+    ttl=3600,
+    maxbytes=int(os.getenv('TRANSLATION_CACHE_BYTES', 4 * 1024 * 1024))
+))
+
+
+# ======================================
+# SINGLE-FLIGHT
+# ======================================
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalescência de requisições: para cada chave, apenas uma chamada
+    fica em andamento; chamadas concorrentes esperam e recebem o mesmo
+    resultado em vez de repetir o trabalho (evita thundering herd).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._executions = 0
+        self._shared = 0
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self._executions += 1
+            else:
+                leader = False
+                self._shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+        return call.result
+
+    def in_flight(self, key):
+        with self._lock:
+            return key in self._calls
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self._executions,
+                "shared": self._shared
+            }
+
+
+request_coalescer = SingleFlight()
 
 
 # ======================================
 # FUNÇÃO UTILITÁRIA
 # ======================================
 
-def get_cached(key, fetch_func=None, cache_obj=None):
+@timed('cache')
+def get_cached(key, fetch_func=None, cache_obj=None, ttl=None, stale_ttl=None):
+    """
+    Retorna o valor do cache ou executa fetch_func uma única vez
+    por chave, mesmo com várias requisições concorrentes.
+
+    Com stale_ttl, um valor expirado há menos de stale_ttl segundos é
+    devolvido imediatamente enquanto uma thread em segundo plano o atualiza.
+    """
     if cache_obj is None:
         cache_obj = cards_cache_obj
 
     value = cache_obj.get(key)
 
-    if value is not None:
+    if value is not None or not fetch_func:
         return value
 
-    if fetch_func:
-        value = fetch_func()
-        if value is not None:
-            cache_obj.set(key, value)
+    flight_key = (id(cache_obj), key)
+
+    def load():
+        # Outra chamada pode ter preenchido o cache enquanto esperávamos
+        value = cache_obj.peek(key)
+        if value is None:
+            value = fetch_func()
+            if value is not None:
+                cache_obj.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+        return value
+
+    if stale_ttl:
+        stale = cache_obj.get_stale(key)
+        if stale is not None:
+            if not request_coalescer.in_flight(flight_key):
+                _revalidate_in_background(flight_key, load)
+            return stale
+
+    return request_coalescer.do(flight_key, load)
 
-    return value
 
-# Adicione no final do cache.py
+def _revalidate_in_background(flight_key, load):
+    def worker():
+        try:
+            request_coalescer.do(flight_key, load)
+        except Exception as e:
+            logger.warning(f"Erro ao revalidar cache {flight_key[1]}: {e}")
+
+    threading.Thread(target=worker, daemon=True).start()
+
 
 def cached(key, ttl=None):
     """Decorator para cache de funções"""
     def decorator(func):
         def wrapper(*args, **kwargs):
             # Usa o cache de cartas como padrão
-            cache_obj = cards_cache_obj
-            value = cache_obj.get(key)
-            
-            if value is not None:
-                return value
-            
-            value = func(*args, **kwargs)
-            if value is not None:
-                cache_obj.set(key, value)
-            return value
+            return get_cached(key, lambda: func(*args, **kwargs), cards_cache_obj, ttl=ttl)
         return wrapper
     return decorator
 
 
 def start_cleanup_thread(interval=300):
     """Inicia thread para limpeza automática do cache"""
-    import threading
-    import time
-    
     def cleanup_worker():
         while True:
             time.sleep(interval)
@@ -0,0 +1,281 @@
+import os
+import json
+import hashlib
+import logging
+import time
+import tempfile
+from types import MappingProxyType
+from collections import namedtuple
+from datetime import datetime
+
+from cache import request_coalescer, register_json_type
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BUNDLE_PATH = os.path.join(BASE_DIR, 'data', 'deck_bundle.json')
+
+# Versão do formato do arquivo (incrementar se a estrutura mudar)
+BUNDLE_FORMAT = 1
+
+# Campos da carta que são traduzidos
+TRANSLATED_FIELDS = ('name', 'meaning_up', 'meaning_rev', 'desc')
+
+
+def deck_version(cards):
+    """Versão do baralho: hash do conteúdo, estável entre processos"""
+    payload = json.dumps(cards, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+def card_texts(card):
+    """Textos em inglês de uma carta que precisam de tradução"""
+    texts = [card.get(field, '') for field in TRANSLATED_FIELDS]
+    if card.get('type') == 'minor':
+        texts.append(card.get('suit', ''))
+    return [text for text in texts if text and isinstance(text, str)]
+
+
+# Estado imutável do baralho. É trocado por inteiro (troca atômica de
+# referência) a cada atualização; version identifica o conteúdo. As cartas
+# ficam numa tupla: nunca são alteradas, e assim podem ser compartilhadas
+# entre workers (copy-on-write) depois de carregadas no master.
+DeckState = namedtuple('DeckState', ['version', 'cards', 'etag', 'fetched_at'])
+
+# No cache compartilhado (JSON) as cartas voltam como lista: refaz a tupla
+register_json_type('deck_state', DeckState, lambda fields: DeckState(
+    fields['version'], tuple(fields['cards']), fields['etag'], fields['fetched_at']))
+
+
+def make_deck_state(cards, etag=None, version=None):
+    return DeckState(version or deck_version(cards), tuple(cards), etag, time.time())
+
+
+# Dados derivados do baralho (índice de busca, tabelas de cartas adaptadas...)
+# name -> (version, value). Só a versão mais recente de cada um é mantida.
+_derived = {}
+
+
+def derived(state, name, builder):
+    """
+    Retorna builder(state) calculado uma única vez por versão do baralho.
+    Quando o baralho muda de versão, o dado é reconstruído no próximo acesso.
+    """
+    current = _derived.get(name)
+    if current is not None and current[0] == state.version:
+        return current[1]
+
+    def build():
+        current = _derived.get(name)
+        if current is not None and current[0] == state.version:
+            return current[1]
+        value = builder(state)
+        # Valores parciais (ex.: traduções fora do prazo) não ficam guardados
+        if not getattr(value, 'partial', False):
+            _derived[name] = (state.version, value)
+        return value
+
+    return request_coalescer.do(('derived', name, state.version), build)
+
+
+def current_derived(name):
+    """Último valor calculado para name (de qualquer versão), ou None"""
+    current = _derived.get(name)
+    return current[1] if current is not None else None
+
+
+def clear_derived():
+    _derived.clear()
+
+
+class AdaptedCardTable:
+    """
+    Cartas já adaptadas (traduzidas) de uma versão do baralho, por name_short.
+
+    Cada carta é adaptada uma única vez, no primeiro acesso, e guardada
+    como mapeamento somente leitura; quem usa recebe uma cópia rasa.
+    Com adapt_many, prefetch adapta de uma vez todas as cartas que ainda
+    faltam (ex.: traduzindo os textos de todas em lote). Cartas com campos
+    ainda sem tradução ('untranslated') não são guardadas.
+    """
+
+    def __init__(self, state, adapt, adapt_many=None):
+        self.version = state.version
+        self._adapt = adapt
+        self._adapt_many = adapt_many
+        self._order = [card.get('name_short') for card in state.cards]
+        self._cards = {card.get('name_short'): card for card in state.cards}
+        self._adapted = {}
+
+    def get(self, name_short):
+        adapted = self._adapted.get(name_short)
+        if adapted is not None:
+            return adapted
+
+        card = self._cards.get(name_short)
+        if card is None:
+            return None
+
+        built = self._adapt(card)
+        if not built:
+            return None
+        if built.get('untranslated'):
+            return MappingProxyType(built)
+        return self._adapted.setdefault(name_short, MappingProxyType(built))
+
+    def prefetch(self, cards):
+        """Adapta juntas as cartas (desta versão) que ainda não foram adaptadas"""
+        missing = {}
+        for card in cards:
+            name_short = card.get('name_short')
+            if name_short not in self._adapted and name_short in self._cards:
+                missing[name_short] = self._cards[name_short]
+        missing = list(missing.values())
+
+        if not missing:
+            return
+        if self._adapt_many is None or len(missing) == 1:
+            for card in missing:
+                self.get(card.get('name_short'))
+            return
+
+        for card, built in zip(missing, self._adapt_many(missing)):
+            if built and not built.get('untranslated'):
+                self._adapted.setdefault(card.get('name_short'), MappingProxyType(built))
+
+    def get_for_card(self, card):
+        """Versão adaptada de card, se ele pertencer a esta versão do baralho"""
+        name_short = card.get('name_short')
+        known = self._cards.get(name_short)
+        if known is None or (known is not card and known != card):
+            return None
+        return self.get(name_short)
+
+    def all(self):
+        self.prefetch(self._cards.values())
+        return [self.get(name_short) for name_short in self._order]
+
+    def get_stats(self):
+        return {
+            "version": self.version,
+            "cards": len(self._cards),
+            "adapted": len(self._adapted)
+        }
+
+
+class DeckBundle:
+    """
+    Baralho pré-traduzido gerado no build (flask deck build).
+    Serve as cartas e as traduções sem nenhuma chamada de rede.
+    """
+
+    def __init__(self, cards, translations, version=None, built_at=None, source=None,
+                 target='pt', etag=None):
+        self.cards = cards
+        self.translations = translations
+        self.version = version or deck_version(cards)
+        self.built_at = built_at
+        self.source = source
+        self.target = target
+        self.etag = etag
+        self.state = DeckState(self.version, tuple(cards), etag, None)
+
+    def translate(self, text):
+        return self.translations.get(text)
+
+    def with_state(self, state):
+        """Novo bundle com o baralho atualizado, mantendo as traduções conhecidas"""
+        bundle = DeckBundle(state.cards, self.translations, version=state.version,
+                            built_at=self.built_at, source=self.source,
+                            target=self.target, etag=state.etag)
+        bundle.state = state
+        return bundle
+
+    def to_dict(self):
+        return {
+            "format": BUNDLE_FORMAT,
+            "version": self.version,
+            "built_at": self.built_at,
+            "source": self.source,
+            "target": self.target,
+            "etag": self.etag,
+            "cards": self.cards,
+            "translations": self.translations
+        }
+
+    def get_stats(self):
+        return {
+            "version": self.version,
+            "built_at": self.built_at,
+            "source": self.source,
+            "cards": len(self.cards),
+            "translations": len(self.translations)
+        }
+
+
+# ======================================
+# BUILD / SAVE / LOAD
+# ======================================
+
+def build_bundle(cards, translate, source=None, target='pt', etag=None):
+    """
+    Traduz todos os campos do baralho e monta o bundle. Textos para os
+    quais translate retorna None ficam fora (são traduzidos em execução).
+    """
+    translations = {}
+    for card in cards:
+        for text in card_texts(card):
+            if text not in translations:
+                translations[text] = translate(text)
+    translations = {text: value for text, value in translations.items() if value is not None}
+
+    return DeckBundle(
+        cards,
+        translations,
+        built_at=datetime.now().isoformat(),
+        source=source,
+        target=target,
+        etag=etag
+    )
+
+
+def save_bundle(bundle, path=DEFAULT_BUNDLE_PATH):
+    """Grava o bundle de forma atômica (arquivo temporário + rename)"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(bundle.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_bundle(path=DEFAULT_BUNDLE_PATH):
+    """Carrega o bundle do disco, ou None se ausente/inválido"""
+    if not path or not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.error(f"Erro ao ler bundle do baralho {path}: {e}")
+        return None
+
+    if data.get('format') != BUNDLE_FORMAT:
+        logger.warning(f"Bundle {path} com formato {data.get('format')} não suportado (esperado {BUNDLE_FORMAT})")
+        return None
+
+    return DeckBundle(
+        data.get('cards', []),
+        data.get('translations', {}),
+        version=data.get('version'),
+        built_at=data.get('built_at'),
+        source=data.get('source'),
+        target=data.get('target', 'pt'),
+        etag=data.get('etag')
+    )
@@ -0,0 +1,43 @@
+# Configuração do gunicorn para produção:
+#
+#     gunicorn -c gunicorn.conf.py wsgi:app
+#
+# preload_app carrega o app (e o warm_up do wsgi.py) uma única vez no master;
+# os workers herdam essa memória por copy-on-write em vez de cada um buscar
+# o baralho e traduzir tudo de novo.
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+preload_app = True
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = 5
+
+
+def pre_fork(server, worker):
+    # Move os objetos já carregados para a geração permanente: o coletor não
+    # os percorre mais e não suja (copia) as páginas compartilhadas
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    wsgi = sys.modules.get('wsgi')
+    if wsgi is not None:
+        wsgi.after_fork()
+
+
+def worker_exit(server, worker):
+    # Último snapshot das métricas do worker (METRICS_MULTIPROC_DIR)
+    from metrics import metrics_obj
+    metrics_obj.flush(force=True)
+
+
+def child_exit(server, worker):
+    # No master: os contadores do worker que saiu vão para o arquivo de
+    # arquivados e o snapshot dele deixa de ser somado no /metrics
+    from metrics import metrics_obj
+    metrics_obj.archive(worker.pid)
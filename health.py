@@ -0,0 +1,112 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class HealthProber:
+    """
+    Verifica as dependências externas (API de tarot, tradutor) em
+    segundo plano, a cada interval segundos, e guarda o histórico.
+    A rota /api/status só lê o último estado conhecido, sem bloquear.
+
+    checks: dict nome -> função que retorna True (ok) ou False/exceção (falha)
+    """
+
+    def __init__(self, checks, interval=30, history=120):
+        self.checks = checks
+        self.interval = interval
+        self._history = {name: deque(maxlen=history) for name in checks}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    # ======================
+    # THREAD
+    # ======================
+    def ensure_started(self):
+        """Inicia a thread (uma vez por processo; refeita após fork)"""
+        if self.interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.probe_once()
+            self._stop.wait(self.interval)
+
+    # ======================
+    # PROBE
+    # ======================
+    def probe_once(self):
+        for name, check in self.checks.items():
+            started = time.perf_counter()
+            error = None
+            try:
+                ok = bool(check())
+            except Exception as e:
+                ok = False
+                error = str(e)
+            latency = time.perf_counter() - started
+
+            with self._lock:
+                self._history[name].append((time.time(), ok, latency, error))
+
+            if not ok:
+                logger.info(f"Health check {name} falhou: {error or 'resposta inválida'}")
+
+    # ======================
+    # SNAPSHOT
+    # ======================
+    def snapshot(self):
+        now = time.time()
+        result = {}
+
+        with self._lock:
+            history = {name: list(entries) for name, entries in self._history.items()}
+
+        for name, entries in history.items():
+            if not entries:
+                result[name] = {"status": "unknown", "checked_at": None, "age_seconds": None}
+                continue
+
+            checked_at, ok, latency, error = entries[-1]
+            latencies = sorted(entry[2] for entry in entries)
+            result[name] = {
+                "status": "online" if ok else "offline",
+                "checked_at": checked_at,
+                "age_seconds": round(now - checked_at, 1),
+                "latency_ms": round(latency * 1000, 1),
+                "error": error,
+                "window": {
+                    "checks": len(entries),
+                    "since": entries[0][0],
+                    "availability": round(sum(1 for entry in entries if entry[1]) / len(entries), 4),
+                    "latency_avg_ms": round(sum(latencies) / len(latencies) * 1000, 1),
+                    "latency_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+                    "latency_p95_ms": round(percentile(latencies, 95) * 1000, 1)
+                }
+            }
+
+        return result
+
+
+def percentile(sorted_values, p):
+    """Percentil (nearest-rank) de uma lista já ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
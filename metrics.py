@@ -0,0 +1,314 @@
+import os
+import json
+import glob
+import time
+import atexit
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Limites (em segundos) dos buckets dos histogramas de latência
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# nome -> (tipo, descrição)
+METRIC_DEFS = {
+    "tarot_http_requests_total": ("counter", "Requisições HTTP por rota, método e status"),
+    "tarot_http_request_duration_seconds": ("histogram", "Latência das requisições HTTP por rota"),
+    "tarot_upstream_requests_total": ("counter", "Chamadas à tarotapi.dev por resultado"),
+    "tarot_upstream_request_duration_seconds": ("histogram", "Latência das chamadas à tarotapi.dev"),
+    "tarot_translator_requests_total": ("counter", "Chamadas ao tradutor por resultado"),
+    "tarot_translator_request_duration_seconds": ("histogram", "Latência das chamadas ao tradutor"),
+    "tarot_cache_hits_total": ("counter", "Acertos por cache"),
+    "tarot_cache_misses_total": ("counter", "Faltas por cache"),
+    "tarot_cache_evictions_total": ("counter", "Remoções por falta de espaço, por cache"),
+    "tarot_cache_expirations_total": ("counter", "Entradas expiradas, por cache"),
+    "tarot_cache_rejections_total": ("counter", "Entradas recusadas pela admissão, por cache"),
+    "tarot_cache_items": ("gauge", "Itens atualmente em cada cache"),
+    "tarot_cache_bytes": ("gauge", "Memória estimada ocupada por cada cache"),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def _is_counter(name):
+    return METRIC_DEFS.get(name, ("untyped",))[0] == "counter"
+
+
+def _pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _merge(snapshots):
+    """Soma os snapshots: ({nome: {labels: valor}}, {nome: {labels: [buckets..., soma, total]}})"""
+    samples = {}
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", []) + snapshot.get("collected", []):
+            series = samples.setdefault(name, {})
+            key = tuple(map(tuple, labels))
+            series[key] = series.get(key, 0) + value
+        for name, labels, values in snapshot.get("histograms", []):
+            series = histograms.setdefault(name, {})
+            key = tuple(map(tuple, labels))
+            current = series.get(key)
+            series[key] = values if current is None else [a + b for a, b in zip(current, values)]
+    return samples, histograms
+
+
+class Metrics:
+    """
+    Métricas no formato texto do Prometheus.
+
+    Contadores e histogramas ficam em dicionários protegidos por um único
+    lock (seções críticas de poucas operações). Valores como os do cache
+    são lidos por coletores só no momento do scrape.
+
+    Com multiproc_dir, cada processo grava periodicamente um snapshot
+    (metrics-<pid>.json) e o /metrics de qualquer worker soma todos.
+    Quando um worker termina, archive() move os contadores e histogramas
+    dele (inclusive os contadores lidos por coletores, como os acertos do
+    cache) para metrics-archive.json; os gauges de processos que já não
+    existem (itens e bytes em cache etc.) são ignorados.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, multiproc_dir=None, flush_interval=5):
+        self.buckets = tuple(buckets)
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._counters = {}    # (name, labels) -> valor
+        self._histograms = {}  # (name, labels) -> [contagens por bucket..., soma, total]
+        self._collectors = []
+        self._lock = threading.Lock()
+        self._last_flush = 0
+        self._flusher_pid = None
+        self._baseline = {}  # (nome, labels) -> valor do coletor no último reset()
+        if multiproc_dir:
+            atexit.register(self.flush, force=True)
+
+    # ======================
+    # REGISTRO
+    # ======================
+    def inc(self, name, labels=(), value=1):
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, seconds):
+        key = (name, tuple(labels))
+        # Bucket calculado fora do lock
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                index = i
+                break
+
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 3)
+            histogram[index] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+    def observe_call(self, dependency, outcome, seconds):
+        """Atalho para chamadas externas (upstream, translator)"""
+        self.inc(f"tarot_{dependency}_requests_total", (("outcome", outcome),))
+        if seconds is not None:
+            self.observe(f"tarot_{dependency}_request_duration_seconds", (), seconds)
+
+    def register_collector(self, collector):
+        """collector() -> lista de (nome, labels, valor), lida a cada scrape"""
+        self._collectors.append(collector)
+
+    def reset(self):
+        """
+        Zera contadores e histogramas (ex.: no worker, após o fork, para não
+        repetir os do master). Os contadores lidos por coletores (acertos do
+        cache etc.) passam a ser contados a partir do valor atual.
+        """
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+        self._baseline = {}
+        self._baseline = {(name, labels): value for name, labels, value in self._collect()
+                          if _is_counter(name)}
+        self._last_flush = 0
+
+    def _collect(self):
+        """Valores dos coletores: lista de (nome, labels, valor), descontada a linha de base"""
+        collected = []
+        for collector in self._collectors:
+            try:
+                for name, labels, value in collector():
+                    labels = tuple(map(tuple, labels))
+                    collected.append((name, labels, value - self._baseline.get((name, labels), 0)))
+            except Exception as e:
+                logger.warning(f"Erro em coletor de métricas: {e}")
+        return collected
+
+    # ======================
+    # SNAPSHOT / MULTIPROCESSO
+    # ======================
+    def snapshot(self):
+        with self._lock:
+            counters = [[name, list(labels), value] for (name, labels), value in self._counters.items()]
+            histograms = [[name, list(labels), list(values)] for (name, labels), values in self._histograms.items()]
+
+        collected = [[name, list(labels), value] for name, labels, value in self._collect()]
+        return {"buckets": list(self.buckets), "counters": counters,
+                "histograms": histograms, "collected": collected}
+
+    def flush(self, force=False):
+        """Grava o snapshot deste processo no diretório compartilhado"""
+        if not self.multiproc_dir:
+            return
+        now = time.time()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+
+        try:
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            self._write(self._path(os.getpid()), self.snapshot())
+        except OSError as e:
+            logger.warning(f"Erro ao gravar métricas em {self.multiproc_dir}: {e}")
+
+    def ensure_flusher(self):
+        """Grava o snapshot a cada flush_interval, mesmo sem requisições (uma thread por processo)"""
+        if not self.multiproc_dir or self.flush_interval <= 0 or self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+        threading.Thread(target=self._run_flusher, name='metrics-flusher', daemon=True).start()
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush(force=True)
+
+    def _path(self, name):
+        return os.path.join(self.multiproc_dir, f"metrics-{name}.json")
+
+    def _load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, data):
+        fd, tmp_path = tempfile.mkstemp(dir=self.multiproc_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def archive(self, pid):
+        """
+        Chamado no master quando o worker pid termina: soma os contadores e
+        histogramas dele ao arquivo de arquivados e apaga o snapshot.
+        """
+        if not self.multiproc_dir:
+            return
+        path = self._path(pid)
+        snapshot = self._load(path)
+        if snapshot is None:
+            return
+
+        try:
+            if tuple(snapshot["buckets"]) == self.buckets:
+                archived = self._load(self._path('archive')) or {"buckets": list(self.buckets)}
+                # Contadores dos coletores entram no total; valores atuais (gauges) saem
+                snapshot["collected"] = [sample for sample in snapshot.get("collected", [])
+                                         if _is_counter(sample[0])]
+                counters, histograms = _merge([archived, snapshot])
+                self._write(self._path('archive'), {
+                    "buckets": list(self.buckets),
+                    "counters": [[name, [list(pair) for pair in labels], value]
+                                 for name, series in counters.items() for labels, value in series.items()],
+                    "histograms": [[name, [list(pair) for pair in labels], values]
+                                   for name, series in histograms.items() for labels, values in series.items()],
+                })
+            os.remove(path)
+        except OSError as e:
+            logger.warning(f"Erro ao arquivar métricas do processo {pid}: {e}")
+
+    def _snapshots(self):
+        if not self.multiproc_dir:
+            return [self.snapshot()]
+
+        self.flush(force=True)
+        snapshots = []
+        for path in glob.glob(self._path('*')):
+            snapshot = self._load(path)
+            if snapshot is None:
+                continue
+            name = os.path.basename(path)[len('metrics-'):-len('.json')]
+            if name.isdigit() and not _pid_alive(int(name)):
+                # Processo que terminou sem archive(): contadores valem, valores atuais não
+                snapshot["collected"] = [sample for sample in snapshot.get("collected", [])
+                                         if _is_counter(sample[0])]
+            snapshots.append(snapshot)
+        return snapshots
+
+    # ======================
+    # RENDER
+    # ======================
+    def render(self):
+        """Texto no formato de exposição do Prometheus (0.0.4), somando todos os processos"""
+        samples, histograms = _merge(
+            snapshot for snapshot in self._snapshots() if tuple(snapshot["buckets"]) == self.buckets)
+
+        lines = []
+        for name in sorted(set(samples) | set(histograms)):
+            kind, help_text = METRIC_DEFS.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for labels, value in sorted(samples.get(name, {}).items()):
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+            for labels, values in sorted(histograms.get(name, {}).items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float('inf'),), values):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', _format_value(bound))])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+
+        return "\n".join(lines) + "\n"
+
+
+# ======================================
+# INSTÂNCIA GLOBAL
+# ======================================
+
+metrics_obj = Metrics(multiproc_dir=os.getenv('METRICS_MULTIPROC_DIR') or None)
@@ -0,0 +1,267 @@
+import io
+import os
+import time
+import heapq
+import hmac
+import pstats
+import marshal
+import cProfile
+import logging
+import itertools
+import threading
+from collections import deque
+from urllib.parse import parse_qs
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE_TOKEN'  # X-Profile-Token: <ADMIN_TOKEN>
+PROFILE_PARAM = '_profile'               # ?_profile=<ADMIN_TOKEN>
+
+
+def token_matches(candidate, token):
+    """Compara o token em tempo constante (token vazio nunca confere)"""
+    if not token or not candidate:
+        return False
+    return hmac.compare_digest(str(candidate).encode(), str(token).encode())
+
+
+class _StatsHolder:
+    """Adaptador para montar um pstats.Stats a partir do dicionário de estatísticas"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class ProfileRecord:
+    """Um perfil de requisição: metadados + estatísticas do cProfile"""
+
+    def __init__(self, profile_id, method, path, status, duration, reason, stats):
+        self.id = profile_id
+        self.method = method
+        self.path = path
+        self.status = status
+        self.duration = duration
+        self.reason = reason  # 'requested' ou 'sampled'
+        self.created_at = time.time()
+        self.stats = stats
+
+    def pstats_bytes(self):
+        """Mesmo formato de pstats.Stats.dump_stats (abre com snakeviz, pstats etc.)"""
+        return marshal.dumps(self.stats)
+
+    def text(self, sort='cumulative', limit=40):
+        stream = io.StringIO()
+        stats = pstats.Stats(_StatsHolder(self.stats), stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def collapsed(self, max_depth=64):
+        """
+        Pilhas no formato "a;b;c <microssegundos>" (flamegraph.pl, speedscope).
+
+        O cProfile guarda só as arestas chamador -> chamado, então as pilhas
+        são reconstruídas distribuindo o tempo acumulado de cada função
+        entre os seus chamados, proporcionalmente a cada aresta.
+        """
+        callees = {}
+        for func, (_, _, _, _, callers) in self.stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, []).append((func, edge[3]))
+
+        roots = [func for func, entry in self.stats.items() if not entry[4]]
+        lines = {}
+
+        def walk(func, share, stack):
+            _, _, tt, ct, _ = self.stats[func]
+            stack = stack + [_frame_name(func)]
+            ratio = share / ct if ct else 0
+
+            own = tt * ratio
+            if own > 0:
+                key = ';'.join(stack)
+                lines[key] = lines.get(key, 0) + own
+
+            if len(stack) >= max_depth:
+                return
+            for child, edge_ct in callees.get(func, ()):
+                if _frame_name(child) in stack:
+                    continue  # recursão: o tempo já foi contado no nível de cima
+                walk(child, edge_ct * ratio, stack)
+
+        for root in roots:
+            walk(root, self.stats[root][3], [])
+
+        return "\n".join(f"{stack} {int(seconds * 1_000_000)}"
+                         for stack, seconds in sorted(lines.items())
+                         if int(seconds * 1_000_000) > 0) + "\n"
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1000, 2),
+            "reason": self.reason,
+            "created_at": self.created_at,
+            "functions": len(self.stats)
+        }
+
+
+def _frame_name(func):
+    filename, line, name = func
+    if filename == '~':
+        return name  # funções nativas: "<built-in method ...>"
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+class RequestProfiler:
+    """
+    Middleware WSGI que roda requisições sob o cProfile, sob demanda.
+
+    Uma requisição é perfilada quando traz o token de admin (cabeçalho
+    X-Profile-Token ou ?_profile=) ou, no modo de amostragem, uma a cada
+    sample_rate requisições. Os perfis pedidos ficam num buffer circular
+    com os mais recentes; os amostrados guardam só os keep mais lentos.
+
+    Só um perfil roda por vez (o cProfile é global no processo a partir do
+    Python 3.12); requisições que chegam nesse meio tempo seguem sem perfil.
+    """
+
+    def __init__(self, wsgi_app, enabled=False, token=None, sample_rate=0, keep=20, output_dir=None):
+        self.wsgi_app = wsgi_app
+        self.enabled = enabled
+        self.token = token
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.output_dir = output_dir
+
+        self._counter = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._requested = deque(maxlen=keep)
+        self._slowest = []  # heap de (duração, id, registro) com os keep mais lentos
+        self._skipped = 0
+
+    # ======================
+    # WSGI
+    # ======================
+    def __call__(self, environ, start_response):
+        reason = self._reason(environ)
+        if reason is None:
+            return self.wsgi_app(environ, start_response)
+
+        if not self._active.acquire(blocking=False):
+            with self._lock:
+                self._skipped += 1
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            return self._profile(environ, start_response, reason)
+        finally:
+            self._active.release()
+
+    def _reason(self, environ):
+        if not self.enabled:
+            return None
+        if self.token:
+            candidate = environ.get(PROFILE_HEADER)
+            if candidate is None and PROFILE_PARAM in environ.get('QUERY_STRING', ''):
+                candidate = parse_qs(environ['QUERY_STRING']).get(PROFILE_PARAM, [None])[0]
+            if token_matches(candidate, self.token):
+                return 'requested'
+        if self.sample_rate and next(self._counter) % self.sample_rate == 0:
+            return 'sampled'
+        return None
+
+    def _profile(self, environ, start_response, reason):
+        profile_id = f"{int(time.time())}-{next(self._ids)}"
+        captured = {}
+
+        def capture_start_response(status, headers, exc_info=None):
+            captured['status'] = int(status.split(' ', 1)[0])
+            if reason == 'requested':
+                headers = list(headers) + [('X-Profile-Id', profile_id)]
+            return start_response(status, headers, exc_info)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            # O corpo é consumido dentro do perfil (inclui a serialização)
+            result = self.wsgi_app(environ, capture_start_response)
+            try:
+                body = list(result)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+
+        profiler.create_stats()
+        record = ProfileRecord(profile_id, environ.get('REQUEST_METHOD'), environ.get('PATH_INFO'),
+                               captured.get('status'), duration, reason, profiler.stats)
+        self._store(record)
+        return body
+
+    # ======================
+    # ARMAZENAMENTO
+    # ======================
+    def _store(self, record):
+        with self._lock:
+            if record.reason == 'requested':
+                self._requested.append(record)
+            elif len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, (record.duration, record.id, record))
+            elif record.duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (record.duration, record.id, record))
+            else:
+                return
+
+        if self.output_dir:
+            try:
+                os.makedirs(self.output_dir, exist_ok=True)
+                base = os.path.join(self.output_dir, f"profile-{record.id}")
+                with open(base + '.pstats', 'wb') as f:
+                    f.write(record.pstats_bytes())
+                with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+                    f.write(record.collapsed())
+            except OSError as e:
+                logger.warning(f"Erro ao gravar perfil em {self.output_dir}: {e}")
+
+        logger.info(f"Perfil {record.id} ({record.reason}): {record.method} {record.path} "
+                    f"em {record.duration * 1000:.1f} ms")
+
+    def get(self, profile_id):
+        with self._lock:
+            for record in list(self._requested) + [entry[2] for entry in self._slowest]:
+                if record.id == profile_id:
+                    return record
+        return None
+
+    def list(self):
+        with self._lock:
+            requested = [record.summary() for record in reversed(self._requested)]
+            slowest = [entry[2].summary() for entry in sorted(self._slowest, reverse=True)]
+        return {"requested": requested, "slowest": slowest}
+
+    def clear(self):
+        with self._lock:
+            self._requested.clear()
+            self._slowest = []
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "sample_rate": self.sample_rate,
+                "keep": self.keep,
+                "requested": len(self._requested),
+                "slowest": len(self._slowest),
+                "skipped_busy": self._skipped
+            }
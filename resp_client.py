@@ -0,0 +1,159 @@
+import os
+import socket
+import logging
+import threading
+from urllib.parse import urlparse, unquote
+
+logger = logging.getLogger(__name__)
+
+
+class RedisError(Exception):
+    """Erro devolvido pelo servidor (-ERR ...)"""
+
+
+class RedisConnectionError(Exception):
+    """Falha de rede ou resposta fora do protocolo"""
+
+
+def encode_command(args):
+    """Comando no formato RESP: array de bulk strings"""
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode()
+        else:
+            data = str(arg).encode()
+        parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+    return b''.join(parts)
+
+
+class Connection:
+    """Uma conexão TCP com o servidor, com leitura bufferizada das respostas"""
+
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile('rb')
+
+    def send(self, payload):
+        self.sock.sendall(payload)
+
+    def read_reply(self):
+        line = self.reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise RedisConnectionError("Conexão encerrada pelo servidor")
+
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            return RedisError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = self.reader.read(length + 2)
+            if len(data) != length + 2:
+                raise RedisConnectionError("Resposta incompleta")
+            return data[:-2]
+        if kind == b'*':
+            length = int(body)
+            if length < 0:
+                return None
+            return [self.read_reply() for _ in range(length)]
+        raise RedisConnectionError(f"Resposta inválida: {line[:20]!r}")
+
+    def close(self):
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class RedisClient:
+    """
+    Cliente mínimo do protocolo do Redis (RESP2), sem dependências.
+
+    Uma conexão por thread (refeita após fork). pipeline() envia vários
+    comandos de uma vez e lê todas as respostas numa única ida e volta.
+
+        client = RedisClient('redis://:senha@localhost:6379/0')
+        client.execute('SET', 'k', b'v', 'PX', 1000)
+        client.pipeline([('GET', 'a'), ('GET', 'b')])
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', timeout=0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, 'pid', None) == os.getpid() and local.conn is not None:
+            return local.conn
+
+        try:
+            conn = Connection(self.host, self.port, self.timeout)
+        except OSError as e:
+            raise RedisConnectionError(f"Não foi possível conectar em {self.host}:{self.port}: {e}")
+
+        setup = []
+        if self.password:
+            setup.append(('AUTH', self.username, self.password) if self.username else ('AUTH', self.password))
+        if self.db:
+            setup.append(('SELECT', self.db))
+        if setup:
+            conn.send(b''.join(encode_command(args) for args in setup))
+            for _ in setup:
+                reply = conn.read_reply()
+                if isinstance(reply, RedisError):
+                    conn.close()
+                    raise reply
+
+        local.pid = os.getpid()
+        local.conn = conn
+        return conn
+
+    def _discard(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def pipeline(self, commands):
+        """
+        Executa os comandos numa única ida e volta. Erros de comando voltam
+        como RedisError na posição correspondente; erros de rede são levantados.
+        """
+        if not commands:
+            return []
+
+        conn = self._connection()
+        try:
+            conn.send(b''.join(encode_command(args) for args in commands))
+            return [conn.read_reply() for _ in commands]
+        except (OSError, RedisConnectionError) as e:
+            # Estado da conexão desconhecido: descarta e deixa o chamador decidir
+            self._discard()
+            if isinstance(e, RedisConnectionError):
+                raise
+            raise RedisConnectionError(str(e))
+
+    def execute(self, *args):
+        reply = self.pipeline([args])[0]
+        if isinstance(reply, RedisError):
+            raise reply
+        return reply
+
+    def ping(self):
+        return self.execute('PING') == 'PONG'
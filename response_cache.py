@@ -0,0 +1,167 @@
+import os
+import gzip
+import hashlib
+import logging
+import threading
+from functools import wraps
+
+from flask import request, current_app
+
+from cache import TinyLFUCache
+
+logger = logging.getLogger(__name__)
+
+# Respostas menores que isso não compensam compressão
+MIN_COMPRESS_SIZE = 1024
+
+# Cabeçalhos recalculados a cada resposta (não são guardados)
+SKIP_HEADERS = {'content-type', 'content-length', 'content-encoding', 'etag', 'vary'}
+
+
+class CachedResponse:
+    """Corpo já serializado (e comprimido) de uma resposta, com ETags fortes"""
+
+    def __init__(self, body, mimetype, headers):
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        self.etag = digest
+
+        if len(body) >= MIN_COMPRESS_SIZE:
+            self.gzipped = gzip.compress(body, compresslevel=6, mtime=0)
+            self.gzip_etag = f"{digest}-gz"
+        else:
+            self.gzipped = None
+            self.gzip_etag = None
+
+
+class ResponseCache:
+    """
+    Cache dos bytes finais das respostas da API, por rota, parâmetros
+    normalizados e versão do baralho. Responde If-None-Match com 304.
+    Quando a versão do baralho muda, as entradas da versão anterior (que
+    não seriam mais pedidas) são descartadas de uma vez, sem esperar o TTL
+    nem disputar a admissão com as da versão nova.
+    """
+
+    def __init__(self, maxsize=256, ttl=3600, maxbytes=None):
+        self._cache = TinyLFUCache(maxsize=maxsize, ttl=ttl, maxbytes=maxbytes)
+        self._lock = threading.Lock()
+        self._not_modified = 0
+        self._gzip_served = 0
+        self._version = None
+
+    def clear(self):
+        return self._cache.clear()
+
+    def _check_version(self, version):
+        if version == self._version:
+            return
+        with self._lock:
+            if version == self._version:
+                return
+            previous, self._version = self._version, version
+        if previous is not None:
+            logger.info(f"Versão do baralho mudou ({previous} -> {version}): cache de respostas limpo")
+            self._cache.clear()
+
+    def route(self, version_func, params=(), vary=None, ttl=None, headers=None, cacheable=None,
+              bypass=None):
+        """
+        Decorator para views GET.
+
+        version_func: retorna a versão do baralho (None desativa o cache)
+        params: parâmetros da query string que fazem parte da chave
+        vary: função com parte extra da chave (ex: data da carta do dia)
+        ttl: validade da entrada (número ou função)
+        headers: função com cabeçalhos calculados a cada resposta (ex: Expires)
+        cacheable: função chamada após a view; False não guarda a resposta
+                   (ex: resposta com traduções pendentes)
+        bypass: função chamada antes da view; True ignora o cache
+                (ex: resposta em streaming)
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                version = None if bypass is not None and bypass() else version_func()
+                if version is None:
+                    return self._add_headers(current_app.make_response(view(*args, **kwargs)), headers)
+                self._check_version(version)
+
+                query = tuple(sorted(
+                    (name, value)
+                    for name in params
+                    for value in request.args.getlist(name)
+                    if value
+                ))
+                key = (request.path, query, version, vary() if vary else None)
+
+                entry = self._cache.get(key)
+                if entry is None:
+                    response = current_app.make_response(view(*args, **kwargs))
+                    if (response.status_code != 200 or response.direct_passthrough
+                            or response.is_streamed
+                            or response.cache_control.no_store
+                            or (cacheable is not None and not cacheable())):
+                        return self._add_headers(response, headers)
+
+                    entry = CachedResponse(
+                        response.get_data(),
+                        response.mimetype,
+                        [(name, value) for name, value in response.headers
+                         if name.lower() not in SKIP_HEADERS]
+                    )
+                    self._cache.set(key, entry, ttl=ttl() if callable(ttl) else ttl)
+
+                return self._add_headers(self._respond(entry), headers)
+            return wrapper
+        return decorator
+
+    def _add_headers(self, response, headers):
+        if headers and response.status_code in (200, 304):
+            for name, value in headers().items():
+                response.headers[name] = value
+        return response
+
+    def _respond(self, entry):
+        use_gzip = entry.gzipped is not None and request.accept_encodings['gzip'] > 0
+        etag = entry.gzip_etag if use_gzip else entry.etag
+
+        if request.if_none_match.contains(entry.etag) or (
+                entry.gzip_etag and request.if_none_match.contains(entry.gzip_etag)):
+            with self._lock:
+                self._not_modified += 1
+            response = current_app.response_class(status=304)
+        else:
+            body = entry.gzipped if use_gzip else entry.body
+            response = current_app.response_class(body, mimetype=entry.mimetype)
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+                with self._lock:
+                    self._gzip_served += 1
+
+        for name, value in entry.headers:
+            response.headers[name] = value
+        response.set_etag(etag)
+        if entry.gzipped is not None:
+            response.vary.add('Accept-Encoding')
+        return response
+
+    def get_stats(self):
+        stats = self._cache.get_stats()
+        with self._lock:
+            stats["not_modified"] = self._not_modified
+            stats["gzip_served"] = self._gzip_served
+        return stats
+
+
+# ======================================
+# INSTÂNCIA GLOBAL
+# ======================================
+
+response_cache_obj = ResponseCache(
+    maxsize=256,
+    ttl=3600,
+    maxbytes=int(os.getenv('RESPONSE_CACHE_BYTES', 32 * 1024 * 1024))
+)
@@ -0,0 +1,102 @@
+import re
+import bisect
+import unicodedata
+
+# Peso de cada campo no ranking (nome pesa mais que descrição)
+FIELD_WEIGHTS = {
+    'name': 10.0,
+    'meaning_up': 3.0,
+    'meaning_rev': 3.0,
+    'desc': 1.0,
+}
+
+# Match por prefixo vale menos que a palavra exata
+PREFIX_FACTOR = 0.5
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text):
+    """Minúsculas e sem acentos: 'Coração' -> 'coracao'"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    if not text or not isinstance(text, str):
+        return []
+    return TOKEN_RE.findall(normalize(text))
+
+
+class SearchIndex:
+    """
+    Índice invertido sobre os campos em inglês e português das cartas.
+
+    Cada palavra aponta para as cartas em que aparece, com uma pontuação
+    ponderada pelo campo. As consultas exigem que todas as palavras
+    casem (exatas ou por prefixo) e ordenam pela pontuação total.
+    """
+
+    def __init__(self):
+        self._postings = {}  # token -> {doc_id: score}
+        self._tokens = []    # tokens ordenados, para busca por prefixo
+        self.size = 0
+        self.partial = False  # True se montado sem todas as traduções
+
+    @classmethod
+    def from_cards(cls, cards, translate):
+        index = cls()
+        for doc_id, card in enumerate(cards):
+            for field, weight in FIELD_WEIGHTS.items():
+                text = card.get(field, '')
+                index.add(doc_id, text, weight)
+                index.add(doc_id, translate(text), weight)
+        index.finalize()
+        index.size = len(cards)
+        return index
+
+    def add(self, doc_id, text, weight):
+        for token in tokenize(text):
+            docs = self._postings.setdefault(token, {})
+            docs[doc_id] = docs.get(doc_id, 0.0) + weight
+
+    def finalize(self):
+        self._tokens = sorted(self._postings)
+
+    def _match(self, token):
+        """Pontuação por carta para um token da consulta (exato + prefixo)"""
+        scores = dict(self._postings.get(token, {}))
+
+        start = bisect.bisect_right(self._tokens, token)
+        for candidate in self._tokens[start:]:
+            if not candidate.startswith(token):
+                break
+            for doc_id, score in self._postings[candidate].items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score * PREFIX_FACTOR
+
+        return scores
+
+    def search(self, query):
+        """Retorna [(doc_id, score)] ordenado por relevância"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        totals = None
+        for token in dict.fromkeys(tokens):
+            scores = self._match(token)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {doc_id: totals[doc_id] + score
+                          for doc_id, score in scores.items() if doc_id in totals}
+            if not totals:
+                return []
+
+        return sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+
+    def get_stats(self):
+        return {
+            "documents": self.size,
+            "tokens": len(self._tokens)
+        }
@@ -0,0 +1,226 @@
+from timing import span
+
+# ======================================
+# REGISTRO DE TIRADAS
+# ======================================
+#
+# Cada tirada é definida só por dados: as posições (campos copiados para
+# cada carta sorteada), o estilo de resumo e o contexto do resumo.
+
+SPREADS = {
+    'three': {
+        'positions': [
+            {"position_name": "Passado", "position_meaning": "Influências que já passaram"},
+            {"position_name": "Presente", "position_meaning": "Situação atual"},
+            {"position_name": "Futuro", "position_meaning": "Tendências futuras"}
+        ],
+        'summary': 'spread',
+        'summary_context': "\n🔮 Nesta tirada de Passado/Presente/Futuro, observe como as energias evoluem através do tempo."
+    },
+    'celtic': {
+        'positions': [
+            {"position_name": "Presente", "position_meaning": "A situação atual"},
+            {"position_name": "Desafio", "position_meaning": "O que está cruzando/desafiando"},
+            {"position_name": "Passado", "position_meaning": "Fundamentos do passado"},
+            {"position_name": "Futuro", "position_meaning": "O que se aproxima"},
+            {"position_name": "Acima", "position_meaning": "Objetivos ou melhor resultado"},
+            {"position_name": "Abaixo", "position_meaning": "Influências inconscientes"},
+            {"position_name": "Conselho", "position_meaning": "Como proceder"},
+            {"position_name": "Influências Externas", "position_meaning": "Pessoas/eventos ao redor"},
+            {"position_name": "Esperanças/Medos", "position_meaning": "Sentimentos internos"},
+            {"position_name": "Resultado", "position_meaning": "Resultado final potencial"}
+        ],
+        'summary': 'spread',
+        'summary_context': "\n🌀 A Cruz Celta é uma tirada profunda que mostra desde as influências inconscientes até o resultado potencial."
+    },
+    'love': {
+        'positions': [
+            {"position_name": "Você", "position_meaning": "Seus sentimentos atuais"},
+            {"position_name": "O Outro", "position_meaning": "Sentimentos da outra pessoa"},
+            {"position_name": "A Relação", "position_meaning": "Dinâmica do relacionamento"},
+            {"position_name": "Desafios", "position_meaning": "O que precisa ser trabalhado"},
+            {"position_name": "Potencial", "position_meaning": "Futuro do relacionamento"}
+        ],
+        'summary': 'spread',
+        'summary_context': "\n💕 Esta tirada do amor revela a dinâmica entre você, o outro e a relação."
+    },
+    'interpret': {
+        'positions': [
+            {"role": "Fatores que influenciam a situação"},
+            {"role": "O caminho a seguir"},
+            {"role": "Resultado potencial"}
+        ],
+        'summary': 'question'
+    }
+}
+
+# Tiradas que podem ser pedidas em /api/tarot/spread/batch
+BATCH_SPREADS = ('three', 'celtic', 'love')
+
+
+# ======================================
+# SORTEIO
+# ======================================
+
+def draw_indices(rng, deck_size, cards_per_reading, readings=1):
+    """
+    Matriz readings x cards_per_reading de índices do baralho,
+    sem repetição dentro de cada leitura.
+    """
+    population = range(deck_size)
+    return [rng.sample(population, cards_per_reading) for _ in range(readings)]
+
+
+def draw_orientations(rng, cards_per_reading, readings=1):
+    """Matriz de orientações (True = reta), gerada a partir de um único número aleatório"""
+    total = cards_per_reading * readings
+    bits = rng.getrandbits(total) if total else 0
+    return [
+        [bool(bits >> (row * cards_per_reading + col) & 1) for col in range(cards_per_reading)]
+        for row in range(readings)
+    ]
+
+
+# ======================================
+# RESUMOS
+# ======================================
+
+def generate_spread_summary(cards, spread_type):
+    """Gera um resumo significativo baseado nas cartas e no tipo de tirada"""
+    if not cards:
+        return "Não foi possível gerar um resumo."
+
+    # Contar posições
+    upright_count = sum(1 for c in cards if c.get('position') == 'upright')
+    reversed_count = len(cards) - upright_count
+
+    # Identificar tipos de cartas
+    major_count = sum(1 for c in cards if c.get('type') == 'major')
+    minor_count = len(cards) - major_count
+
+    # Analisar naipes (para cartas menores)
+    suits = {}
+    for card in cards:
+        if card.get('suit'):
+            suit = card['suit'].lower()
+            suits[suit] = suits.get(suit, 0) + 1
+
+    # Construir resumo baseado no tipo de tirada
+    summary_parts = []
+
+    # Análise geral de energia
+    if upright_count > reversed_count:
+        summary_parts.append("✨ A maioria das cartas está na posição reta, indicando que as energias estão fluindo de forma favorável e direta.")
+    elif reversed_count > upright_count:
+        summary_parts.append("🌙 Há várias cartas invertidas, sugerindo a necessidade de introspecção e cuidado com energias bloqueadas.")
+    else:
+        summary_parts.append("⚖️ Há um equilíbrio entre cartas retas e invertidas, indicando um momento de integração entre luz e sombra.")
+
+    # Análise de Arcanos Maiores vs Menores
+    if major_count > minor_count:
+        summary_parts.append("🃏 A presença forte de Arcanos Maiores indica que lições importantes do destino estão se manifestando.")
+    elif major_count == 0:
+        summary_parts.append("📜 Apenas Arcanos Menores surgiram, sugerindo que o foco está em situações práticas do dia a dia.")
+
+    # Análise de naipes (se houver)
+    if suits:
+        suit_meanings = []
+        if suits.get('wands', 0) >= 2:
+            suit_meanings.append("⚡ energia criativa e ação (Paus)")
+        if suits.get('cups', 0) >= 2:
+            suit_meanings.append("💧 emoções e relacionamentos (Copas)")
+        if suits.get('swords', 0) >= 2:
+            suit_meanings.append("🌪️ conflitos e pensamentos (Espadas)")
+        if suits.get('pentacles', 0) >= 2:
+            suit_meanings.append("🌱 questões materiais e trabalho (Ouros)")
+
+        if suit_meanings:
+            summary_parts.append(f"Os naipes em destaque são: {', '.join(suit_meanings)}.")
+
+    # Adicionar contexto específico da tirada
+    context = SPREADS.get(spread_type, {}).get('summary_context')
+    if context:
+        summary_parts.append(context)
+
+    # Citar carta de destaque
+    if cards:
+        first_card = cards[0]
+        card_name = first_card.get('name', '')
+        card_position = first_card.get('position', 'upright')
+        card_meaning = first_card.get('meaning_upright' if card_position == 'upright' else 'meaning_reversed', '')
+
+        if card_meaning:
+            short_meaning = card_meaning[:100] + "..." if len(card_meaning) > 100 else card_meaning
+            summary_parts.append(f"\n🎴 Destaque para {card_name}: {short_meaning}")
+
+    return " ".join(summary_parts)
+
+
+def generate_question_summary(cards, spread_type=None):
+    """Resumo curto para a interpretação de uma pergunta"""
+    upright_count = sum(1 for c in cards if c.get('position') == 'upright')
+
+    if upright_count >= 2:
+        return "As cartas indicam um caminho favorável para sua questão. Confie no processo."
+    elif upright_count == 1:
+        return "Há aspectos positivos e desafiadores em sua questão. Busque equilíbrio."
+    else:
+        return "Momento de introspecção. Reavalie sua abordagem antes de agir."
+
+
+SUMMARIES = {
+    'spread': generate_spread_summary,
+    'question': generate_question_summary,
+}
+
+
+# ======================================
+# MOTOR DE TIRADAS
+# ======================================
+
+def build_reading(spread_type, cards, indices, orientations, adapt):
+    """Monta uma leitura a partir de uma linha da matriz de sorteio"""
+    layout = SPREADS[spread_type]
+
+    spread = []
+    for position, index, upright in zip(layout['positions'], indices, orientations):
+        adapted = adapt(cards[index], 'upright' if upright else 'reversed')
+        adapted.update(position)
+        spread.append(adapted)
+
+    with span('summary'):
+        summary = SUMMARIES[layout['summary']](spread, spread_type)
+
+    return {
+        "cards": spread,
+        "summary": summary
+    }
+
+
+def generate_readings(spread_type, cards, rng, count, adapt, prefetch=None):
+    """
+    Gera count leituras do tipo spread_type de uma vez.
+    prefetch, se informado, recebe antes todas as cartas sorteadas
+    (para adaptá-las/traduzi-las juntas).
+    """
+    return list(iter_readings(spread_type, cards, rng, count, adapt, prefetch=prefetch))
+
+
+def iter_readings(spread_type, cards, rng, count, adapt, prefetch=None, chunk_size=None):
+    """
+    Como generate_readings, mas entrega as leituras uma a uma, montando
+    chunk_size por vez (prefetch recebe as cartas de cada bloco). O sorteio
+    é todo feito antes: a mesma semente gera as mesmas leituras.
+    """
+    size = min(len(SPREADS[spread_type]['positions']), len(cards))
+    indices = draw_indices(rng, len(cards), size, count)
+    orientations = draw_orientations(rng, size, count)
+
+    step = chunk_size or count or 1
+    for start in range(0, count, step):
+        rows = indices[start:start + step]
+        if prefetch is not None:
+            prefetch([cards[index] for row in rows for index in row])
+
+        for row, orientation_row in zip(rows, orientations[start:start + step]):
+            yield build_reading(spread_type, cards, row, orientation_row, adapt)
@@ -0,0 +1,127 @@
+import time
+import threading
+import contextvars
+from functools import wraps
+from contextlib import contextmanager
+
+# Cronometragem da requisição atual (None fora de uma requisição)
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """
+    Tempo gasto por etapa (span) em uma requisição.
+
+    Cada span registra só o próprio tempo: o tempo dos spans aninhados é
+    descontado do span de fora (na mesma thread). Assim translate dentro de
+    adapt não é contado duas vezes.
+
+    Spans de outras threads (ex.: lotes do tradutor no executor) somam o
+    tempo de cada thread e não são descontados de quem os espera: com
+    trabalho em paralelo, a soma das etapas pode passar do total.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._totals = {}  # nome -> [segundos, chamadas]
+        self._order = []
+        self._lock = threading.Lock()
+        self._local = threading.local()  # pilha de spans ativos por thread
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def add(self, name, seconds, calls=1):
+        with self._lock:
+            entry = self._totals.get(name)
+            if entry is None:
+                entry = self._totals[name] = [0.0, 0]
+                self._order.append(name)
+            entry[0] += seconds
+            entry[1] += calls
+
+    def enter(self):
+        # [início, tempo dos filhos]
+        frame = [time.perf_counter(), 0.0]
+        self._stack().append(frame)
+        return frame
+
+    def exit(self, name, frame):
+        elapsed = time.perf_counter() - frame[0]
+        stack = self._stack()
+        stack.pop()
+        if stack:
+            stack[-1][1] += elapsed
+        self.add(name, max(0.0, elapsed - frame[1]))
+
+    def external(self, name, seconds):
+        """Tempo medido por fora (ex.: observer do upstream) dentro do span atual"""
+        stack = self._stack()
+        if stack:
+            stack[-1][1] += seconds
+        self.add(name, seconds)
+
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def breakdown(self):
+        """Lista de (nome, milissegundos, chamadas) na ordem em que apareceram"""
+        with self._lock:
+            return [(name, self._totals[name][0] * 1000, self._totals[name][1]) for name in self._order]
+
+
+def start_request():
+    timings = RequestTimings()
+    _current.set(timings)
+    return timings
+
+
+def end_request():
+    _current.set(None)
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name):
+    """Mede o bloco como a etapa name da requisição atual (sem requisição, não faz nada)"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    frame = timings.enter()
+    try:
+        yield
+    finally:
+        timings.exit(name, frame)
+
+
+def timed(name):
+    """Decorator equivalente a span(name) em volta da função"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name, seconds):
+    """Soma um tempo já medido à requisição atual"""
+    timings = _current.get()
+    if timings is not None and seconds is not None:
+        timings.external(name, seconds)
+
+
+def server_timing_header(timings):
+    """Valor do cabeçalho Server-Timing (ex.: cache;dur=0.2, translate;dur=812.0, total;dur=950.1)"""
+    parts = [f"{name};dur={ms:.1f}" for name, ms, _ in timings.breakdown()]
+    parts.append(f"total;dur={timings.total() * 1000:.1f}")
+    return ", ".join(parts)
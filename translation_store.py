@@ -0,0 +1,324 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import tempfile
+import threading
+
+import click
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_STORE_PATH = os.path.join(BASE_DIR, 'data', 'translations.db')
+DEFAULT_OVERLAY_PATH = os.path.join(tempfile.gettempdir(), 'tarot_translations.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    source_hash TEXT NOT NULL,
+    target TEXT NOT NULL,
+    source TEXT NOT NULL,
+    translated TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source_hash, target)
+)
+"""
+
+# PRAGMA user_version dos arquivos. Até a versão 1, textos com mais de
+# LEGACY_TRUNCATED_CHARS caracteres eram traduzidos cortados nesse tamanho
+# e gravados com a chave do texto inteiro: essas linhas são removidas na
+# migração (ou ignoradas, num arquivo base somente leitura)
+SCHEMA_VERSION = 1
+LEGACY_TRUNCATED_CHARS = 500
+LEGACY_FILTER = f" AND length(source) <= {LEGACY_TRUNCATED_CHARS}"
+
+
+def text_hash(text):
+    """Hash usado como chave das traduções (o mesmo do cache em memória)"""
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+class TranslationStore:
+    """
+    Armazenamento persistente de traduções em SQLite.
+
+    Sobrevive a reinícios e é compartilhado por todos os processos do host.
+    Se o arquivo base não puder ser escrito (ex: deploy read-only na Vercel),
+    ele é aberto apenas para leitura e as novas traduções vão para um
+    arquivo de sobreposição gravável (overlay).
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, overlay_path=None, target='pt'):
+        self.path = path
+        self.overlay_path = overlay_path
+        self.target = target
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._errors = 0
+
+    # ======================
+    # CONEXÕES
+    # ======================
+    def _connect(self, path, readonly=False):
+        if readonly:
+            conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True,
+                                   timeout=5, check_same_thread=False)
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            conn.commit()
+            self._migrate(conn, path)
+        return conn
+
+    def _migrate(self, conn, path):
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        with conn:
+            removed = conn.execute(
+                "DELETE FROM translations WHERE length(source) > ?", (LEGACY_TRUNCATED_CHARS,)
+            ).rowcount
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if removed:
+            logger.info(f"Removidas {removed} traduções cortadas de versões antigas em {path}")
+
+    def _filter(self, conn):
+        """Condição extra para ler conn (linhas antigas cortadas, se o arquivo não foi migrado)"""
+        return LEGACY_FILTER if conn is getattr(self._local, 'legacy', None) else ''
+
+    def _connections(self):
+        """
+        Retorna (gravável, somente leitura) para a thread atual.
+        As conexões são refeitas após um fork (pid diferente).
+        """
+        local = self._local
+        if getattr(local, 'pid', None) == os.getpid():
+            return local.writable, local.readonly
+
+        writable = readonly = legacy = None
+
+        if self.overlay_path is None:
+            try:
+                writable = self._connect(self.path)
+            except (sqlite3.Error, OSError) as e:
+                logger.info(f"Store de traduções read-only ({e}), usando overlay em {DEFAULT_OVERLAY_PATH}")
+                self.overlay_path = DEFAULT_OVERLAY_PATH
+
+        if writable is None:
+            if os.path.exists(self.path):
+                try:
+                    readonly = self._connect(self.path, readonly=True)
+                    if readonly.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                        legacy = readonly
+                except sqlite3.Error as e:
+                    logger.warning(f"Erro ao abrir store base {self.path}: {e}")
+            writable = self._connect(self.overlay_path)
+
+        local.pid = os.getpid()
+        local.writable = writable
+        local.readonly = readonly
+        local.legacy = legacy
+        return writable, readonly
+
+    # ======================
+    # GET
+    # ======================
+    def get(self, text, source_hash=None):
+        source_hash = source_hash or text_hash(text)
+        try:
+            writable, readonly = self._connections()
+            for conn in (writable, readonly):
+                if conn is None:
+                    continue
+                row = conn.execute(
+                    "SELECT translated FROM translations WHERE source_hash = ? AND target = ?"
+                    + self._filter(conn),
+                    (source_hash, self.target)
+                ).fetchone()
+                if row is not None:
+                    with self._lock:
+                        self._hits += 1
+                    return row[0]
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Erro ao ler store de traduções: {e}")
+            with self._lock:
+                self._errors += 1
+            return None
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def get_many(self, texts, source_hashes=None):
+        """Busca várias traduções de uma vez. Retorna dict texto -> tradução (só as encontradas)"""
+        by_hash = {}
+        for i, text in enumerate(texts):
+            source_hash = source_hashes[i] if source_hashes and source_hashes[i] else text_hash(text)
+            by_hash[source_hash] = text
+
+        found = {}
+        hashes = list(by_hash)
+        try:
+            writable, readonly = self._connections()
+            # Limite de parâmetros por consulta do SQLite
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                for conn in (readonly, writable):
+                    if conn is None:
+                        continue
+                    for source_hash, translated in conn.execute(
+                        f"SELECT source_hash, translated FROM translations "
+                        f"WHERE target = ? AND source_hash IN ({placeholders})" + self._filter(conn),
+                        [self.target] + chunk
+                    ):
+                        # O overlay (lido por último) tem prioridade
+                        found[by_hash[source_hash]] = translated
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Erro ao ler store de traduções: {e}")
+            with self._lock:
+                self._errors += 1
+            return found
+
+        with self._lock:
+            self._hits += len(found)
+            self._misses += len(by_hash) - len(found)
+        return found
+
+    # ======================
+    # SET
+    # ======================
+    def set(self, text, translated, source_hash=None):
+        return self.set_many([(text, translated)], source_hashes=[source_hash]) > 0
+
+    def set_many(self, items, source_hashes=None):
+        """Grava vários pares (texto, tradução) em uma única transação"""
+        now = time.time()
+        rows = []
+        for i, (text, translated) in enumerate(items):
+            source_hash = source_hashes[i] if source_hashes and source_hashes[i] else text_hash(text)
+            rows.append((source_hash, self.target, text, translated, now))
+
+        if not rows:
+            return 0
+
+        try:
+            writable, _ = self._connections()
+            with writable:
+                writable.executemany(
+                    "INSERT OR REPLACE INTO translations "
+                    "(source_hash, target, source, translated, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Erro ao gravar store de traduções: {e}")
+            with self._lock:
+                self._errors += 1
+            return 0
+
+        with self._lock:
+            self._writes += len(rows)
+        return len(rows)
+
+    # ======================
+    # EXPORT / IMPORT
+    # ======================
+    def export_rows(self):
+        """Todas as traduções (overlay tem prioridade sobre a base)"""
+        writable, readonly = self._connections()
+        rows = {}
+        for conn in (readonly, writable):
+            if conn is None:
+                continue
+            for source_hash, source, translated, updated_at in conn.execute(
+                "SELECT source_hash, source, translated, updated_at FROM translations WHERE target = ?"
+                + self._filter(conn),
+                (self.target,)
+            ):
+                rows[source_hash] = {
+                    "source": source,
+                    "translated": translated,
+                    "updated_at": updated_at
+                }
+        return [rows[key] for key in sorted(rows)]
+
+    def import_rows(self, rows):
+        return self.set_many([(row['source'], row['translated']) for row in rows])
+
+    def count(self):
+        try:
+            return len(self.export_rows())
+        except (sqlite3.Error, OSError):
+            return 0
+
+    # ======================
+    # STATS
+    # ======================
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "path": self.path,
+                "overlay_path": self.overlay_path,
+                "target": self.target,
+                "hits": self._hits,
+                "misses": self._misses,
+                "writes": self._writes,
+                "errors": self._errors,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# ======================================
+# INSTÂNCIA GLOBAL
+# ======================================
+
+translation_store_obj = TranslationStore(
+    path=os.getenv('TRANSLATION_STORE_PATH', DEFAULT_STORE_PATH),
+    overlay_path=os.getenv('TRANSLATION_STORE_OVERLAY') or None,
+)
+
+
+# ======================================
+# CLI (flask translations export/import)
+# ======================================
+
+@click.group('translations')
+def translations_cli():
+    """Exporta e importa o armazenamento de traduções"""
+
+
+@translations_cli.command('export')
+@click.argument('output', type=click.File('w', encoding='utf-8'), default='-')
+def export_command(output):
+    """Exporta todas as traduções para JSON"""
+    rows = translation_store_obj.export_rows()
+    json.dump({"target": translation_store_obj.target, "translations": rows},
+              output, ensure_ascii=False, indent=2)
+    output.write("\n")
+    click.echo(f"{len(rows)} traduções exportadas", err=True)
+
+
+@translations_cli.command('import')
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+def import_command(source):
+    """Importa traduções de um arquivo JSON gerado pelo export"""
+    data = json.load(source)
+    rows = data.get('translations', []) if isinstance(data, dict) else data
+    imported = translation_store_obj.import_rows(rows)
+    click.echo(f"{imported} traduções importadas", err=True)
+
+
+@translations_cli.command('stats')
+def stats_command():
+    """Mostra o total de traduções armazenadas"""
+    click.echo(json.dumps({"total": translation_store_obj.count(),
+                           **translation_store_obj.get_stats()}, indent=2))
@@ -0,0 +1,218 @@
+import time
+import random
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """O circuito está aberto: a chamada nem chega a ser feita"""
+
+
+class CircuitBreaker:
+    """
+    Disjuntor simples: depois de failure_threshold falhas seguidas o
+    circuito abre e as chamadas falham na hora; após reset_timeout
+    segundos uma única chamada de teste é liberada (half-open).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == self.OPEN and time.time() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self._state
+
+    def allow(self):
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_progress or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Circuito aberto após {self._failures} falhas")
+                self._state = self.OPEN
+                self._opened_at = time.time()
+            self._trial_in_progress = False
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout_seconds": self.reset_timeout
+            }
+
+
+class UpstreamClient:
+    """
+    Cliente HTTP compartilhado para a tarotapi.dev.
+
+    Usa uma requests.Session com pool de conexões keep-alive, repete
+    falhas transitórias com backoff exponencial e jitter e protege a API
+    (e os nossos tempos de resposta) com um circuit breaker.
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, base_url, pool_size=10, retries=2, backoff=0.2, max_backoff=2.0,
+                 timeout=10, breaker=None, observer=None):
+        self.base_url = base_url.rstrip('/')
+        self.observer = observer  # observer(resultado, segundos) a cada tentativa
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+
+        self.pool_size = pool_size
+        self.session = self._new_session()
+
+        self._rng = random.Random()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._successes = 0
+        self._failures = 0
+        self._retries = 0
+        self._short_circuited = 0
+        self._latency_total = 0.0
+        self._last_latency = None
+
+    def _new_session(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def reset_connections(self):
+        """
+        Troca a sessão por uma nova, sem conexões abertas. Usado após um
+        fork: as conexões herdadas do processo pai não podem ser compartilhadas.
+        """
+        self.session = self._new_session()
+
+    def _sleep_before_retry(self, attempt):
+        # Backoff exponencial com "full jitter"
+        delay = min(self.max_backoff, self.backoff * (2 ** attempt))
+        time.sleep(self._rng.uniform(0, delay))
+
+    def get(self, path, timeout=None, headers=None, retries=None):
+        """
+        GET em base_url + path. Retorna a requests.Response (inclusive 4xx).
+        Levanta CircuitOpenError com o circuito aberto, ou a última exceção
+        de rede / resposta 5xx depois de esgotar as tentativas.
+        """
+        url = f"{self.base_url}{path}"
+        retries = self.retries if retries is None else retries
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                with self._lock:
+                    self._short_circuited += 1
+                self._notify('short_circuited', None)
+                raise CircuitOpenError(f"Circuito aberto para {self.base_url}")
+
+            started = time.perf_counter()
+            error = None
+            response = None
+            recorded = False
+            try:
+                try:
+                    response = self.session.get(url, timeout=timeout or self.timeout, headers=headers)
+                    if response.status_code in self.RETRY_STATUS:
+                        error = requests.HTTPError(f"{response.status_code} em {url}", response=response)
+                except requests.RequestException as e:
+                    error = e
+                elapsed = time.perf_counter() - started
+
+                with self._lock:
+                    self._requests += 1
+                    self._latency_total += elapsed
+                    self._last_latency = elapsed
+                    if error is None:
+                        self._successes += 1
+                    else:
+                        self._failures += 1
+
+                self._notify('success' if error is None else 'failure', elapsed)
+
+                recorded = True
+                if error is None:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+            finally:
+                # Exceção inesperada (não de rede): conta como falha, o que
+                # também libera a chamada de teste do half-open
+                if not recorded:
+                    self.breaker.record_failure()
+
+            if attempt >= retries:
+                if response is not None:
+                    return response
+                raise error
+
+            with self._lock:
+                self._retries += 1
+            self._sleep_before_retry(attempt)
+            attempt += 1
+
+    def _notify(self, outcome, elapsed):
+        if self.observer is not None:
+            try:
+                self.observer(outcome, elapsed)
+            except Exception as e:
+                logger.warning(f"Erro no observer do upstream: {e}")
+
+    def get_stats(self):
+        with self._lock:
+            stats = {
+                "base_url": self.base_url,
+                "pool_size": self.pool_size,
+                "requests": self._requests,
+                "successes": self._successes,
+                "failures": self._failures,
+                "retries": self._retries,
+                "short_circuited": self._short_circuited,
+                "avg_latency_ms": round(self._latency_total / self._requests * 1000, 2) if self._requests else None,
+                "last_latency_ms": round(self._last_latency * 1000, 2) if self._last_latency is not None else None
+            }
+        stats["circuit"] = self.breaker.get_stats()
+        return stats
@@ -0,0 +1,103 @@
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+# Prazo (time.monotonic) da requisição atual; None = sem prazo
+_deadline = contextvars.ContextVar('request_deadline', default=None)
+
+
+# ======================================
+# PRAZO DA REQUISIÇÃO
+# ======================================
+
+def set_deadline(seconds):
+    """Define o orçamento de tempo da requisição atual (0 ou None = sem prazo)"""
+    _deadline.set(time.monotonic() + seconds if seconds else None)
+
+
+def clear_deadline():
+    _deadline.set(None)
+
+
+def remaining():
+    """Segundos que restam do orçamento (None sem prazo, nunca negativo)"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def wait_for(futures):
+    """Espera as futures até o prazo da requisição. Retorna (prontas, pendentes)"""
+    if not futures:
+        return set(), set()
+    return wait(futures, timeout=remaining())
+
+
+# ======================================
+# EXECUTOR
+# ======================================
+
+class BoundedExecutor:
+    """
+    Pool de threads com tamanho fixo, compartilhado pelo processo, para
+    trabalho de rede (tradutor, API). As tarefas rodam com uma cópia do
+    contexto de quem as enviou (spans do Server-Timing, prazo).
+
+    O pool é criado no primeiro uso e refeito após um fork.
+    """
+
+    def __init__(self, max_workers=8, name='worker'):
+        self.max_workers = max_workers
+        self.name = name
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+
+    def _get_pool(self):
+        if self._pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+                self._pid = os.getpid()
+            return self._pool
+
+    def submit(self, fn, *args, **kwargs):
+        context = contextvars.copy_context()
+        future = self._get_pool().submit(context.run, fn, *args, **kwargs)
+        with self._lock:
+            self._submitted += 1
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            pool, self._pool, self._pid = self._pool, None, None
+        if pool is not None:
+            pool.shutdown(wait=wait)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "in_flight": self._submitted - self._completed - self._failed
+            }
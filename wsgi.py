@@ -0,0 +1,30 @@
+"""
+Ponto de entrada WSGI para produção (gunicorn).
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Com preload_app, este módulo é importado uma vez no master: o baralho, as
+traduções, as cartas adaptadas e o índice de busca são carregados antes do
+fork e compartilhados pelos workers. WARM_UP=0 desliga o pré-carregamento.
+"""
+import os
+
+
+def create_app(warm=None):
+    import app as application
+
+    if warm is None:
+        warm = os.getenv('WARM_UP', '1') != '0'
+    if warm:
+        with application.app.app_context():
+            application.warm_up()
+    return application.app
+
+
+def after_fork():
+    """Chamado no worker logo após o fork (post_fork do gunicorn)"""
+    import app as application
+    application.reset_after_fork()
+
+
+app = create_app()